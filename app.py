@@ -1,18 +1,142 @@
+import argparse
 import sys
-import tkinter as tk
 from PIL import Image # Still needed for the version check
 
-from gui_app import LiveViewApp # Import the GUI class
+def run_gui():
+    import tkinter as tk
+    from gui_app import LiveViewApp # Import the GUI class
+
+    root = tk.Tk()
+    LiveViewApp(root) # Fonts and the initial font preview load after the window is first shown
+    root.mainloop() # Start the Tkinter event loop
+
+def _encode_options(args):
+    return {"quality": args.quality, "compress_level": args.compress_level, "optimize": args.optimize}
+
+def run_batch_command(args):
+    from batch_render import run_batch
+
+    if args.results:
+        with open(args.results, "w", encoding="utf-8") as results_file:
+            summary = run_batch(args.jobs_file, workers=args.workers, ordered=not args.unordered,
+                                output_dir=args.output_dir, results_stream=results_file,
+                                conversion_cache_path=args.conversion_cache,
+                                output_format=args.format, encode_options=_encode_options(args))
+    else:
+        summary = run_batch(args.jobs_file, workers=args.workers, ordered=not args.unordered,
+                            output_dir=args.output_dir, conversion_cache_path=args.conversion_cache,
+                            output_format=args.format, encode_options=_encode_options(args))
+    return 1 if summary["errors"] else 0
+
+def run_template_command(args):
+    from batch_render import run_template
+
+    run_template(args.base_image, args.captions_file, args.font, font_size_px=args.size,
+                 text_y_offset_percent=args.y_offset, font_color=args.color, qr_code_file_path=args.qr,
+                 output_dir=args.output_dir, convert_captions=not args.legacy_text,
+                 output_format=args.format, encode_options=_encode_options(args), writer_threads=args.writer_threads,
+                 auto_fit=args.fit, outline_color=args.outline_color)
+    return 0
+
+def run_variants_command(args):
+    from batch_render import run_variants
+
+    summary = run_variants(args.base_image, args.caption, args.font, args.colors, outline_colors=args.outline_colors,
+                           outline_widths=args.outline_widths or (None,), font_size_px=args.size, text_y_offset_percent=args.y_offset,
+                           qr_code_file_path=args.qr, output_dir=args.output_dir, convert_caption=not args.legacy_text,
+                           output_format=args.format, encode_options=_encode_options(args), writer_threads=args.writer_threads)
+    return 1 if summary["errors"] else 0
+
+def run_serve_command(args):
+    from render_server import run_server
+    from font_utils import configure_conversion_cache
+
+    if args.conversion_cache:
+        configure_conversion_cache(db_path=args.conversion_cache)
+    run_server(args.host, args.port, image_paths=args.image, workers=args.workers, max_queue=args.max_queue,
+               conversion_backend=args.conversion_backend)
+    return 0
+
+def _add_output_arguments(subparser):
+    from output_utils import FORMAT_EXTENSIONS, DEFAULT_QUALITY, BULK_PNG_COMPRESS_LEVEL
+
+    subparser.add_argument("--format", type=str.upper, choices=list(FORMAT_EXTENSIONS), default="PNG",
+                           help="Output format for generated file names (default: PNG).")
+    subparser.add_argument("--quality", type=int, default=DEFAULT_QUALITY, help="JPEG/WebP quality (default: %(default)s).")
+    subparser.add_argument("--compress-level", type=int, choices=range(10), default=BULK_PNG_COMPRESS_LEVEL, metavar="0-9",
+                           help="PNG zlib level (default: %(default)s; 6 is Pillow's default and about 4x slower for ~10%% smaller files).")
+    subparser.add_argument("--optimize", action="store_true", help="Spend extra encoder time for smaller files.")
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Sinhala Unicode to TTF Image App. Starts the GUI when no command is given.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch_parser = subparsers.add_parser("batch", help="Render a JSON-lines job file headlessly.")
+    batch_parser.add_argument("jobs_file", help="One JSON job per line: base_image, text or unicode_text, font, size, y_offset, color, outline_color, qr, output, fit.")
+    batch_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    batch_parser.add_argument("--unordered", action="store_true", help="Stream results as jobs finish instead of in job order.")
+    batch_parser.add_argument("--output-dir", default="batch_output", help="Where jobs without an 'output' path are written.")
+    batch_parser.add_argument("--results", default=None, help="Write result records to this file instead of stdout.")
+    batch_parser.add_argument("--conversion-cache", default=None, help="sqlite file that keeps Unicode conversions between runs.")
+    _add_output_arguments(batch_parser)
+
+    template_parser = subparsers.add_parser("template", help="Render many captions over one base image.")
+    template_parser.add_argument("base_image", help="Background image shared by every caption.")
+    template_parser.add_argument("captions_file", help="One Sinhala Unicode caption per line.")
+    template_parser.add_argument("--font", required=True, help="Font file path or a file name from the fonts folder.")
+    template_parser.add_argument("--size", type=int, default=100, help="Font size in pixels.")
+    template_parser.add_argument("--y-offset", type=float, default=50.0, help="Text vertical start in percent of image height.")
+    template_parser.add_argument("--color", default="white", help="Font color.")
+    template_parser.add_argument("--outline-color", default="black", help="Text outline color.")
+    template_parser.add_argument("--qr", default=None, help="Optional QR code image.")
+    template_parser.add_argument("--output-dir", default="batch_output", help="Where the numbered images are written.")
+    template_parser.add_argument("--legacy-text", action="store_true", help="Captions are already in the legacy font encoding.")
+    template_parser.add_argument("--fit", action="store_true", help="Wrap and size each caption to fit below the offset; --size is the largest size.")
+    template_parser.add_argument("--writer-threads", type=int, default=None, help="Threads encoding images while the next ones render.")
+    _add_output_arguments(template_parser)
+
+    variants_parser = subparsers.add_parser("variants", help="Render one caption in many font and outline colors.")
+    variants_parser.add_argument("base_image", help="Background image shared by every variant.")
+    variants_parser.add_argument("caption", help="Sinhala Unicode caption.")
+    variants_parser.add_argument("--font", required=True, help="Font file path or a file name from the fonts folder.")
+    variants_parser.add_argument("--colors", nargs="+", required=True, help="Font colors.")
+    variants_parser.add_argument("--outline-colors", nargs="+", default=["black"], help="Outline colors.")
+    variants_parser.add_argument("--outline-widths", nargs="+", type=int, default=None, help="Outline widths in pixels (default: scaled to the font size).")
+    variants_parser.add_argument("--size", type=int, default=100, help="Font size in pixels.")
+    variants_parser.add_argument("--y-offset", type=float, default=50.0, help="Text vertical start in percent of image height.")
+    variants_parser.add_argument("--qr", default=None, help="Optional QR code image.")
+    variants_parser.add_argument("--output-dir", default="batch_output",
+                                 help="Where the numbered images are written, font color varying slowest, then outline color, then width.")
+    variants_parser.add_argument("--legacy-text", action="store_true", help="The caption is already in the legacy font encoding.")
+    variants_parser.add_argument("--writer-threads", type=int, default=None, help="Threads encoding images while the next ones render.")
+    _add_output_arguments(variants_parser)
+
+    serve_parser = subparsers.add_parser("serve", help="Run a local HTTP render service (POST /render, GET /metrics).")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default: localhost only).")
+    serve_parser.add_argument("--port", type=int, default=8000, help="Port to listen on; 0 picks a free one.")
+    serve_parser.add_argument("--workers", type=int, default=None, help="Render threads (default: up to 4).")
+    serve_parser.add_argument("--max-queue", type=int, default=32, help="Renders allowed to wait before requests get 503.")
+    serve_parser.add_argument("--image", action="append", default=None,
+                              help="Base/QR image preloaded by file name; repeat for more (default: the bundled images).")
+    serve_parser.add_argument("--conversion-cache", default=None, help="sqlite file that keeps Unicode conversions between runs.")
+    serve_parser.add_argument("--conversion-backend", choices=["auto", "local", "remote"], default=None,
+                              help="How 'unicode_text' is converted; auto/local work offline (default: $SINHALA_CONVERSION_BACKEND or remote).")
+    return parser
 
 if __name__ == "__main__":
-    # Run GUI mode only
     # Check if Pillow supports the necessary resampling filter
     if not hasattr(Image, 'Resampling') or not hasattr(Image.Resampling, 'LANCZOS'):
          print("❌ Error: Pillow version is too old. Please upgrade Pillow to version 9.1.0 or later (`pip install --upgrade Pillow`).")
          sys.exit(1)
 
-    root = tk.Tk()
-    app = LiveViewApp(root)
-    # Call update_font_preview once at startup to set the initial preview
-    app.update_font_preview()
-    root.mainloop() # Start the Tkinter event loop
+    args = build_arg_parser().parse_args()
+    if args.command == "batch":
+        sys.exit(run_batch_command(args))
+    if args.command == "template":
+        sys.exit(run_template_command(args))
+    if args.command == "variants":
+        sys.exit(run_variants_command(args))
+    if args.command == "serve":
+        sys.exit(run_serve_command(args))
+    # Run GUI mode when no command is given
+    run_gui()
@@ -0,0 +1,283 @@
+import json
+import math
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from image_utils import LayeredOverlay, render_many, load_image, DEFAULT_OUTLINE_COLOR
+from font_registry import get_font
+from text_layout import fit_text_to_image, TEXT_ALIGN_CENTER
+from font_utils import resource_path, convert_unicode_to_legacy, configure_conversion_cache, FONTS_FOLDER
+from output_utils import save_image, format_from_path, ImageWriter, DirectorySink, DEFAULT_OUTPUT_FORMAT, FORMAT_EXTENSIONS
+
+# --- Defaults for fields a job line may leave out ---
+DEFAULT_JOB_FONT_SIZE = 100
+DEFAULT_JOB_Y_OFFSET = 50.0
+DEFAULT_JOB_COLOR = "white"
+DEFAULT_OUTPUT_DIR = "batch_output"
+WORKER_OVERLAY_CACHE_SIZE = 8 # Base images whose layered overlays a worker keeps; each holds a full-size RGBA copy
+
+# Per-worker LRU of layered overlays per base image: path -> (decoded image, overlay). Fonts come from each
+# worker's font registry.
+_worker_overlays = OrderedDict()
+
+def _init_worker(conversion_cache_path=None):
+    # Keep diagnostic prints from the render code off stdout, which carries the result records
+    sys.stdout = sys.stderr
+    if conversion_cache_path:
+        configure_conversion_cache(db_path=conversion_cache_path) # Workers share conversions through the file
+
+def resolve_font_path(font_name):
+    """Accepts a font file path or a file name from the bundled fonts folder."""
+    if os.path.isfile(font_name):
+        return font_name
+    bundled_path = os.path.join(resource_path(FONTS_FOLDER), font_name)
+    if os.path.isfile(bundled_path):
+        return bundled_path
+    raise FileNotFoundError(f"Font '{font_name}' not found as a path or in '{FONTS_FOLDER}'.")
+
+def _get_overlay(image_path):
+    image = load_image(image_path) # EXIF orientation applied, as in the GUI
+    cached = _worker_overlays.get(image_path)
+    # The decoded-image cache returns a new image once the file changes, so a stale overlay is never reused
+    if cached is not None and cached[0] is image:
+        _worker_overlays.move_to_end(image_path)
+        return cached[1]
+    overlay = LayeredOverlay(image)
+    _worker_overlays[image_path] = (image, overlay)
+    _worker_overlays.move_to_end(image_path)
+    while len(_worker_overlays) > WORKER_OVERLAY_CACHE_SIZE:
+        _worker_overlays.popitem(last=False)
+    return overlay
+
+def load_jobs(jobs_file_path):
+    """
+    Reads a JSON-lines job file. Blank lines are skipped; each job keeps its line order as `index`.
+    A line that is not a JSON object is kept as a ValueError, which render_job reports as that job's
+    error record, so one bad line does not abort the run.
+    """
+    jobs = []
+    with open(jobs_file_path, encoding="utf-8") as jobs_file:
+        for line_number, line in enumerate(jobs_file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                job = ValueError(f"Line {line_number} is not valid JSON: {e}")
+            else:
+                if not isinstance(job, dict):
+                    job = ValueError(f"Line {line_number} is not a JSON object.")
+            jobs.append(job)
+    return jobs
+
+def render_job(index, job, output_dir=DEFAULT_OUTPUT_DIR, output_format=DEFAULT_OUTPUT_FORMAT, encode_options=None):
+    """
+    Renders one job and writes it to disk. Never raises: failures come back as an error record
+    so one bad line does not abort the run. A job's own output path picks the format by its extension;
+    generated names use output_format. encode_options go to output_utils.encode_image.
+    """
+    start = time.perf_counter()
+    record = {"index": index, "status": "ok"}
+    try:
+        if isinstance(job, Exception):
+            raise job # A job line load_jobs could not parse
+        overlay = _get_overlay(job["base_image"])
+        ttf_path = resolve_font_path(job["font"])
+        font_size_px = int(job.get("size", DEFAULT_JOB_FONT_SIZE))
+
+        if "unicode_text" in job:
+            text_to_draw = convert_unicode_to_legacy(job["unicode_text"]) if job["unicode_text"] else ""
+        else:
+            text_to_draw = job.get("text", "")
+
+        text_y_offset_percent = float(job.get("y_offset", DEFAULT_JOB_Y_OFFSET))
+        get_font(ttf_path, font_size_px) # Loaded here so an unreadable font fails the job
+        text_align = "left"
+        if job.get("fit") and text_to_draw:
+            # "size" becomes the largest size allowed
+            font_size_px, text_to_draw = fit_text_to_image(text_to_draw, ttf_path, overlay.base_image.size, text_y_offset_percent, font_size_px)
+            text_align = TEXT_ALIGN_CENTER
+            record["font_size"] = font_size_px
+        image = overlay.render(
+            text_to_draw,
+            ttf_path,
+            font_size_px,
+            text_y_offset_percent=text_y_offset_percent,
+            font_color=job.get("color", DEFAULT_JOB_COLOR),
+            outline_color=job.get("outline_color", DEFAULT_OUTLINE_COLOR),
+            qr_code_file_path=job.get("qr"),
+            text_align=text_align,
+        )
+
+        output_path = job.get("output") or os.path.join(output_dir, f"{index:06d}{FORMAT_EXTENSIONS[output_format]}")
+        output_parent = os.path.dirname(output_path)
+        if output_parent:
+            os.makedirs(output_parent, exist_ok=True)
+        save_image(image, output_path, format_from_path(output_path, output_format), **(encode_options or {}))
+        record["output"] = output_path
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return record
+
+def _render_job_args(args):
+    return render_job(*args)
+
+def iter_batch_results(jobs, workers=None, ordered=True, output_dir=DEFAULT_OUTPUT_DIR, conversion_cache_path=None,
+                       output_format=DEFAULT_OUTPUT_FORMAT, encode_options=None):
+    """
+    Renders jobs across a process pool and yields one result record per job as it finishes.
+    With ordered=True records come back in job order; otherwise in completion order.
+    """
+    job_args = [(index, job, output_dir, output_format, encode_options) for index, job in enumerate(jobs)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(conversion_cache_path,)) as executor:
+        if ordered:
+            yield from executor.map(_render_job_args, job_args, chunksize=4)
+        else:
+            futures = [executor.submit(render_job, *args) for args in job_args]
+            for future in as_completed(futures):
+                yield future.result()
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize_results(records, wall_seconds):
+    """
+    Counts and throughput for a run. Latency percentiles cover successful jobs only, so fast failures do not
+    pull them down; failed jobs get their own p50.
+    """
+    job_times = sorted(r["elapsed_ms"] for r in records if r["status"] == "ok")
+    error_times = sorted(r["elapsed_ms"] for r in records if r["status"] != "ok")
+    ok_count = len(job_times)
+    return {
+        "jobs": len(records),
+        "ok": ok_count,
+        "errors": len(records) - ok_count,
+        "wall_seconds": round(wall_seconds, 3),
+        "images_per_second": round(ok_count / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        "p50_ms": _percentile(job_times, 50),
+        "p99_ms": _percentile(job_times, 99),
+        "error_p50_ms": _percentile(error_times, 50),
+    }
+
+def run_batch(jobs_file_path, workers=None, ordered=True, output_dir=DEFAULT_OUTPUT_DIR, results_stream=None, conversion_cache_path=None,
+              output_format=DEFAULT_OUTPUT_FORMAT, encode_options=None):
+    """Runs a job file, streaming one JSON record per job to results_stream, and returns the summary."""
+    results_stream = results_stream or sys.stdout
+    jobs = load_jobs(jobs_file_path)
+    records = []
+    start = time.perf_counter()
+    for record in iter_batch_results(jobs, workers=workers, ordered=ordered, output_dir=output_dir,
+                                     conversion_cache_path=conversion_cache_path, output_format=output_format,
+                                     encode_options=encode_options):
+        records.append(record)
+        results_stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        results_stream.flush()
+    summary = summarize_results(records, time.perf_counter() - start)
+    print(f"ℹ️ Batch finished: {summary['ok']}/{summary['jobs']} ok, {summary['errors']} errors, "
+          f"{summary['images_per_second']} images/sec, p50 {summary['p50_ms']} ms, p99 {summary['p99_ms']} ms per job.",
+          file=sys.stderr)
+    return summary
+
+def _write_numbered(images, output_dir, output_format, encode_options, writer_threads, start):
+    """
+    Writes images to output_dir as 000000.png, 000001.png, ... on an ImageWriter thread pool while the next
+    ones render. An exception in place of an image (see render_many) becomes that index's error record.
+    Returns (records, wall seconds since `start`).
+    """
+    pending = []
+    with ImageWriter(DirectorySink(output_dir), output_format, workers=writer_threads, **(encode_options or {})) as writer:
+        for index, image in enumerate(images):
+            render_ms = (time.perf_counter() - start) * 1000
+            pending.append((index, render_ms, image if isinstance(image, Exception) else writer.submit(f"{index:06d}", image)))
+
+    records = []
+    for index, render_ms, future in pending:
+        record = {"index": index, "status": "ok", "render_ms": round(render_ms, 3)}
+        try:
+            if isinstance(future, Exception):
+                raise future
+            record["output"] = future.result()
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"
+        records.append(record)
+    wall_seconds = time.perf_counter() - start
+    # Steady-state cost per image: gaps between consecutive render completions
+    previous_ms = 0.0
+    for record in records:
+        record["elapsed_ms"] = round(record["render_ms"] - previous_ms, 3)
+        previous_ms = record["render_ms"]
+    return records, wall_seconds
+
+def load_captions(captions_file_path):
+    """One caption per line; blank lines are skipped."""
+    with open(captions_file_path, encoding="utf-8") as captions_file:
+        return [line.strip() for line in captions_file if line.strip()]
+
+def _convert_caption(caption):
+    """The legacy-encoded caption, or the exception converting it raised (render_many passes it through)."""
+    try:
+        return convert_unicode_to_legacy(caption)
+    except Exception as e:
+        return e
+
+def run_template(base_image_path, captions_file_path, font_name, font_size_px=DEFAULT_JOB_FONT_SIZE,
+                 text_y_offset_percent=DEFAULT_JOB_Y_OFFSET, font_color=DEFAULT_JOB_COLOR, qr_code_file_path=None,
+                 output_dir=DEFAULT_OUTPUT_DIR, convert_captions=True, output_format=DEFAULT_OUTPUT_FORMAT,
+                 encode_options=None, writer_threads=None, auto_fit=False, outline_color=DEFAULT_OUTLINE_COLOR):
+    """
+    Renders every caption in the file over one base image via render_many and writes them to output_dir
+    as 000000.png, 000001.png, ... in caption order. Encoding runs on an ImageWriter thread pool while
+    the next caption renders. With auto_fit each caption is wrapped and sized to fit, up to font_size_px.
+    A caption that cannot be converted or rendered gets an error record; the rest still render.
+    Returns the batch summary.
+    """
+    captions = load_captions(captions_file_path)
+    if convert_captions:
+        captions = [_convert_caption(caption) for caption in captions]
+    ttf_path = resolve_font_path(font_name)
+
+    start = time.perf_counter()
+    base_image = load_image(base_image_path)
+    rendered = render_many(base_image, captions, ttf_path, font_size_px, text_y_offset_percent=text_y_offset_percent,
+                           font_color=font_color, qr_code_file_path=qr_code_file_path, auto_fit=auto_fit,
+                           outline_color=outline_color)
+    summary = summarize_results(*_write_numbered(rendered, output_dir, output_format, encode_options, writer_threads, start))
+    print(f"ℹ️ Template finished: {summary['ok']}/{summary['jobs']} images, {summary['images_per_second']} images/sec, "
+          f"p50 {summary['p50_ms']} ms, p99 {summary['p99_ms']} ms per caption.", file=sys.stderr)
+    return summary
+
+def run_variants(base_image_path, caption, font_name, font_colors, outline_colors=(DEFAULT_OUTLINE_COLOR,), outline_widths=(None,),
+                 font_size_px=DEFAULT_JOB_FONT_SIZE, text_y_offset_percent=DEFAULT_JOB_Y_OFFSET, qr_code_file_path=None,
+                 output_dir=DEFAULT_OUTPUT_DIR, convert_caption=True, output_format=DEFAULT_OUTPUT_FORMAT,
+                 encode_options=None, writer_threads=None):
+    """
+    Renders one caption over one base image in every font color x outline color x outline width combination
+    (font color varying slowest) via variant_render.render_variants, written to output_dir as 000000.png, ...
+    An outline width of None is the default for the font size. Returns the batch summary.
+    """
+    from variant_render import render_variants, make_variants # NumPy is only needed for variant sweeps
+
+    if convert_caption:
+        caption = convert_unicode_to_legacy(caption)
+    ttf_path = resolve_font_path(font_name)
+    variants = make_variants(font_colors, outline_colors, outline_widths)
+
+    start = time.perf_counter()
+    base_image = load_image(base_image_path)
+    rendered = render_variants(base_image, caption, ttf_path, font_size_px, variants, text_y_offset_percent=text_y_offset_percent,
+                               qr_code_file_path=qr_code_file_path)
+    summary = summarize_results(*_write_numbered(rendered, output_dir, output_format, encode_options, writer_threads, start))
+    print(f"ℹ️ Variants finished: {summary['ok']}/{summary['jobs']} images, {summary['images_per_second']} images/sec, "
+          f"p50 {summary['p50_ms']} ms, p99 {summary['p99_ms']} ms per variant.", file=sys.stderr)
+    return summary
@@ -0,0 +1,469 @@
+import collections
+import contextlib
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import PIL
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from font_utils import resource_path, find_ttf_fonts, convert_unicode_to_legacy, FONTS_FOLDER, CONVERSION_BACKEND_LOCAL
+from font_registry import FontRegistry
+from image_utils import (get_outline_strength, render_text_masks, colorize_text_masks, composite_sprite, generate_overlayed_image,
+                         render_many, add_qr_code_to_image, LayeredOverlay, DecodedImageCache, QR_CODE_MARGIN, OUTLINE_STROKE_SQUARE)
+from output_utils import encode_image
+from render_timing import collect_stage_timings
+from text_layout import fit_text_to_image
+
+BENCH_BASE_IMAGE = "jokes_bg.png"
+BENCH_FONT = "fonts/4u-arjun.ttf"
+BENCH_TEXT = "úys¿ kï b;sx\nweïv ;uhs''"
+BENCH_FONT_SIZES = [25, 50, 100, 200, 300, 400]
+BENCH_QR_CODE = "qr_code.png"
+BENCH_CAPTIONS = ["úys¿ kï b;sx", "weïv ;uhs''", "isxy, fm<", "fuys fhdokak", "Y%S ,xldj"]
+
+# --- Suite sweeps: each dimension is varied on its own around the baseline case ---
+BENCH_BASE_IMAGES = ["jokes_bg.png", "jk1.png"]
+BENCH_SUITE_FONT_SIZES = [25, 50, 100, 200, 400]
+BENCH_IMAGE_SCALES = [0.5, 1.0, 2.0, 4.0] # 4x jokes_bg.png is about 25 megapixels
+BENCH_UNICODE_TEXTS = {
+    "short": "සිංහල",
+    "medium": "සිංහල භාෂාව ලස්සනයි",
+    "long": "ශ්‍රී ලංකාව ඉන්දියන් සාගරයේ මුතු ඇටයයි\nසිංහල භාෂාව ලස්සනයි\nඅපි හැමෝම එකට වැඩ කරමු",
+}
+BENCH_BASELINE = {"base_image": "jokes_bg.png", "scale": 1.0, "font": os.path.basename(BENCH_FONT), "size": 100, "text": "medium", "qr": True}
+BENCH_PREVIEW_SIZE = (800, 600) # LiveViewApp.MAX_PREVIEW_WIDTH / MAX_PREVIEW_HEIGHT
+BENCH_REGRESSION_THRESHOLD = 0.10 # compare: flag cases that got more than 10% slower
+BENCH_VARIANT_COLORS = ["white", "black", "#ffcc00", "#ff3b30", "#34c759", "#0a84ff"]
+BENCH_VARIANT_OUTLINE_COLORS = ["black", "white"]
+BENCH_VARIANT_OUTLINE_WIDTHS = [2, 4] # 6 x 2 x 2 = 24 variants
+BENCH_STARTUP_MODULES = ["app", "gui_app", "batch_render", "render_server"]
+BENCH_STARTUP_PROBE_ENV = "SINHALA_APP_STARTUP_PROBE" # gui_app.STARTUP_PROBE_ENV
+BENCH_STARTUP_TIMEOUT_S = 60
+BENCH_IMPORT_TOP = 10 # Slowest imports listed per module
+
+def draw_outlined_text_legacy(image, text_to_draw, font, origin, outline_strength, font_color):
+    """The original outline renderer: one draw.text call per (dx, dy) offset. Kept as the reference output."""
+    draw = ImageDraw.Draw(image)
+    x, y = origin
+    for dx_outline in range(-outline_strength, outline_strength + 1):
+        for dy_outline in range(-outline_strength, outline_strength + 1):
+            if dx_outline == 0 and dy_outline == 0:
+                continue
+            draw.text((x + dx_outline, y + dy_outline), text_to_draw, font=font, fill="black")
+    draw.text((x, y), text_to_draw, font=font, fill=font_color)
+
+def draw_outlined_text_masked(image, text_to_draw, font, origin, outline_strength, font_color, outline_stroke=OUTLINE_STROKE_SQUARE):
+    text_masks = render_text_masks(text_to_draw, font, origin, outline_strength, outline_stroke)
+    if text_masks:
+        glyph_mask, outline_mask, position = text_masks
+        composite_sprite(image, colorize_text_masks(glyph_mask, outline_mask, font_color), position)
+
+def _best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_outline(font_sizes=BENCH_FONT_SIZES, repeat=3, font_color="#ffffff"):
+    """
+    Times the legacy per-offset outline against the mask-dilation outline for each font size
+    and reports how far apart their pixels are. Returns a list of result dicts.
+    """
+    base = Image.open(resource_path(BENCH_BASE_IMAGE)).convert("RGBA")
+    results = []
+    for font_size_px in font_sizes:
+        font = ImageFont.truetype(resource_path(BENCH_FONT), font_size_px)
+        outline_strength = get_outline_strength(font_size_px)
+        origin = (base.width * 0.1, base.height * 0.2)
+
+        legacy_image = base.copy()
+        masked_image = base.copy()
+        legacy_s = _best_of(lambda: draw_outlined_text_legacy(legacy_image, BENCH_TEXT, font, origin, outline_strength, font_color), repeat)
+        masked_s = _best_of(lambda: draw_outlined_text_masked(masked_image, BENCH_TEXT, font, origin, outline_strength, font_color), repeat)
+
+        # Fresh single renders for the pixel diff (the timed images were drawn over repeatedly)
+        legacy_image = base.copy()
+        masked_image = base.copy()
+        draw_outlined_text_legacy(legacy_image, BENCH_TEXT, font, origin, outline_strength, font_color)
+        draw_outlined_text_masked(masked_image, BENCH_TEXT, font, origin, outline_strength, font_color)
+        diff_histogram = ImageChops.difference(legacy_image.convert("RGB"), masked_image.convert("RGB")).convert("L").histogram()
+
+        results.append({
+            "font_size_px": font_size_px,
+            "outline_strength": outline_strength,
+            "legacy_ms": legacy_s * 1000,
+            "masked_ms": masked_s * 1000,
+            "speedup": legacy_s / masked_s if masked_s else float("inf"),
+            "max_pixel_diff": max(level for level, count in enumerate(diff_histogram) if count),
+            "pixels_over_8": sum(diff_histogram[9:]),
+        })
+    return results
+
+def print_outline_results(results):
+    print(f"{'size':>6} {'radius':>6} {'legacy ms':>10} {'masked ms':>10} {'speedup':>8} {'max diff':>8} {'px > 8':>8}")
+    for r in results:
+        print(f"{r['font_size_px']:>6} {r['outline_strength']:>6} {r['legacy_ms']:>10.1f} {r['masked_ms']:>10.1f} "
+              f"{r['speedup']:>7.1f}x {r['max_pixel_diff']:>8} {r['pixels_over_8']:>8}")
+
+def bench_template(caption_count=100, font_size_px=120):
+    """
+    Renders the same captions over one base image with QR code, once as a generate_overlayed_image loop
+    and once through render_many. Encoding is left out so only rendering is compared.
+    """
+    base = Image.open(resource_path(BENCH_BASE_IMAGE))
+    ttf_path = resource_path(BENCH_FONT)
+    qr_code_file_path = resource_path(BENCH_QR_CODE)
+    captions = [BENCH_CAPTIONS[i % len(BENCH_CAPTIONS)] + f" {i}" for i in range(caption_count)]
+
+    start = time.perf_counter()
+    for caption in captions:
+        generate_overlayed_image(base, caption, ttf_path, font_size_px, 20.0, "white", qr_code_file_path)
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in render_many(base, captions, ttf_path, font_size_px, 20.0, "white", qr_code_file_path):
+        pass
+    template_s = time.perf_counter() - start
+
+    return {
+        "captions": caption_count,
+        "loop_ms_per_caption": loop_s * 1000 / caption_count,
+        "render_many_ms_per_caption": template_s * 1000 / caption_count,
+        "speedup": loop_s / template_s if template_s else float("inf"),
+    }
+
+def print_template_results(result):
+    print(f"{result['captions']} captions: generate_overlayed_image loop {result['loop_ms_per_caption']:.1f} ms/caption, "
+          f"render_many {result['render_many_ms_per_caption']:.1f} ms/caption ({result['speedup']:.1f}x)")
+
+def bench_variants(font_size_px=120):
+    """
+    Renders one caption in every BENCH_VARIANT_* combination, once as a per-variant mask/colorize/composite
+    loop and once through render_variants, then reports the largest pixel difference between the two.
+    Images are dropped as they are produced, as when each is written out, so only rendering is timed.
+    """
+    import numpy as np
+    from variant_render import render_variants, make_variants
+
+    base = Image.open(resource_path(BENCH_BASE_IMAGE)).convert("RGB")
+    ttf_path = resource_path(BENCH_FONT)
+    variants = make_variants(BENCH_VARIANT_COLORS, BENCH_VARIANT_OUTLINE_COLORS, BENCH_VARIANT_OUTLINE_WIDTHS)
+    font = FontRegistry().get_font(ttf_path, font_size_px)
+
+    def render_looped():
+        # generate_overlayed_image sizes the outline from the font size, so each width is drawn directly
+        for variant in variants:
+            image = base.convert("RGBA")
+            text_bbox = ImageDraw.Draw(image).textbbox((0, 0), BENCH_TEXT, font=font)
+            origin = ((image.width - (text_bbox[2] - text_bbox[0])) / 2 - text_bbox[0], image.height * 0.2 - text_bbox[1])
+            glyph_mask, outline_mask, position = render_text_masks(BENCH_TEXT, font, origin, variant["outline_width"], text_bbox=text_bbox)
+            composite_sprite(image, colorize_text_masks(glyph_mask, outline_mask, variant["font_color"], variant["outline_color"]), position)
+            yield image
+
+    def render_vectorized():
+        return render_variants(base, BENCH_TEXT, ttf_path, font_size_px, variants, 20.0)
+
+    loop_ms = _best_of(lambda: collections.deque(render_looped(), maxlen=0), 3) * 1000
+    variants_ms = _best_of(lambda: collections.deque(render_vectorized(), maxlen=0), 3) * 1000
+    max_diff = max(int(np.abs(np.asarray(a, dtype=np.int16) - np.asarray(b, dtype=np.int16)).max())
+                   for a, b in zip(render_looped(), render_vectorized()))
+    return {
+        "variants": len(variants),
+        "loop_ms_per_variant": loop_ms / len(variants),
+        "render_variants_ms_per_variant": variants_ms / len(variants),
+        "speedup": loop_ms / variants_ms if variants_ms else float("inf"),
+        "max_pixel_diff": max_diff,
+    }
+
+def print_variant_results(result):
+    print(f"{result['variants']} variants: per-variant loop {result['loop_ms_per_variant']:.1f} ms/variant, "
+          f"render_variants {result['render_variants_ms_per_variant']:.1f} ms/variant ({result['speedup']:.1f}x, "
+          f"max diff {result['max_pixel_diff']})")
+
+def _time_runs(func, repeat):
+    """Runs func `repeat` times; returns (median ms, min ms, mean per-run stage ms)."""
+    times_ms = []
+    stage_totals = {}
+    for _ in range(repeat):
+        with collect_stage_timings() as stage_timings:
+            start = time.perf_counter()
+            func()
+            times_ms.append((time.perf_counter() - start) * 1000)
+        for stage, stage_ms in stage_timings.items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + stage_ms
+    stages = {stage: round(total / repeat, 3) for stage, total in sorted(stage_totals.items())}
+    return round(statistics.median(times_ms), 3), round(min(times_ms), 3), stages
+
+def _suite_metadata(repeat):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": repeat,
+    }
+
+def _generate_cases():
+    """Baseline plus one-dimension-at-a-time variations, keyed by case name so the baseline appears once."""
+    fonts = [os.path.basename(path) for path in find_ttf_fonts(resource_path(FONTS_FOLDER))]
+    sweeps = {
+        "base_image": BENCH_BASE_IMAGES,
+        "scale": BENCH_IMAGE_SCALES,
+        "font": fonts,
+        "size": BENCH_SUITE_FONT_SIZES,
+        "text": list(BENCH_UNICODE_TEXTS),
+        "qr": [True, False],
+    }
+    cases = {}
+    for dimension, values in sweeps.items():
+        for value in values:
+            params = dict(BENCH_BASELINE, **{dimension: value})
+            name = (f"generate/{params['base_image']}/x{params['scale']}/{params['font']}/{params['size']}px/"
+                    f"{params['text']}/{'qr' if params['qr'] else 'no-qr'}")
+            cases[name] = params
+    return cases
+
+def _load_scaled_base(base_image_name, scale, loaded):
+    key = (base_image_name, scale)
+    if key not in loaded:
+        with Image.open(resource_path(base_image_name)) as opened:
+            image = opened.convert("RGB")
+        if scale != 1.0:
+            image = image.resize((round(image.width * scale), round(image.height * scale)), Image.Resampling.LANCZOS)
+        loaded[key] = image
+    return loaded[key]
+
+def bench_suite(repeat=5):
+    """
+    Times the render pipeline offline against the bundled fonts and images and returns a JSON-ready dict:
+    {"meta": {...}, "results": [{"name", "case", "params", "median_ms", "min_ms", "stages"}, ...]}.
+    Stage times are the mean per run from render_timing; caches are warm except where a case says cold.
+    """
+    results = []
+    loaded_bases = {}
+    qr_code_file_path = resource_path(BENCH_QR_CODE)
+    fonts_folder = resource_path(FONTS_FOLDER)
+
+    def add(name, case, params, func):
+        func() # Warm-up run so the numbers are steady-state
+        median_ms, min_ms, stages = _time_runs(func, repeat)
+        results.append({"name": name, "case": case, "params": params, "median_ms": median_ms, "min_ms": min_ms, "stages": stages})
+
+    legacy_texts = {label: convert_unicode_to_legacy(text, backend=CONVERSION_BACKEND_LOCAL) for label, text in BENCH_UNICODE_TEXTS.items()}
+
+    for name, params in _generate_cases().items():
+        base = _load_scaled_base(params["base_image"], params["scale"], loaded_bases)
+        ttf_path = os.path.join(fonts_folder, params["font"])
+        qr = qr_code_file_path if params["qr"] else None
+        add(name, "generate_overlayed_image", params,
+            lambda: generate_overlayed_image(base, legacy_texts[params["text"]], ttf_path, params["size"], 20.0, "white", qr))
+
+    baseline_ttf_path = os.path.join(fonts_folder, BENCH_BASELINE["font"])
+    for scale in BENCH_IMAGE_SCALES:
+        target = _load_scaled_base(BENCH_BASELINE["base_image"], scale, loaded_bases).copy() # Drawn over repeatedly
+        add(f"generate_in_place/x{scale}", "generate_overlayed_image", dict(BENCH_BASELINE, scale=scale, in_place=True),
+            lambda: generate_overlayed_image(target, legacy_texts[BENCH_BASELINE["text"]], baseline_ttf_path, BENCH_BASELINE["size"],
+                                             20.0, "white", qr_code_file_path, in_place=True))
+
+    for scale in BENCH_IMAGE_SCALES:
+        base = _load_scaled_base(BENCH_BASELINE["base_image"], scale, loaded_bases).convert("RGBA")
+        add(f"add_qr_code/x{scale}", "add_qr_code_to_image", {"scale": scale, "size": list(base.size)},
+            lambda: add_qr_code_to_image(base.copy(), base.height, qr_code_file_path))
+
+    for label, text in BENCH_UNICODE_TEXTS.items():
+        add(f"convert/{label}", "convert_unicode_to_legacy", {"text": label, "characters": len(text)},
+            lambda: convert_unicode_to_legacy(text, backend=CONVERSION_BACKEND_LOCAL))
+
+    for font_name in sorted(os.listdir(fonts_folder)):
+        if font_name.lower().endswith(".ttf"):
+            font_path = os.path.join(fonts_folder, font_name)
+            add(f"font_load/{font_name}", "font_load", {"font": font_name},
+                lambda: FontRegistry().get_font(font_path, BENCH_BASELINE["size"]))
+
+    full_base = _load_scaled_base(BENCH_BASELINE["base_image"], 1.0, loaded_bases)
+    # Auto-fit: the binary search over sizes with word widths and bboxes already memoized
+    for label, legacy_text in legacy_texts.items():
+        add(f"fit/{label}", "fit_text_to_image", {"text": label, "max_size": 400},
+            lambda: fit_text_to_image(legacy_text, baseline_ttf_path, full_base.size, 20.0, 400))
+
+    # Uncached decodes, as when the GUI opens an image (preview size) and when it downloads (full size)
+    for base_image_name in BENCH_BASE_IMAGES:
+        image_path = resource_path(base_image_name)
+        for label, max_size in (("preview", BENCH_PREVIEW_SIZE), ("full", None)):
+            add(f"load/{base_image_name}/{label}", "load_image", {"base_image": base_image_name, "max_size": max_size},
+                lambda: DecodedImageCache().get(image_path, max_size))
+
+    # The live preview path (LiveViewApp._render_preview): a thumbnail base and sizes scaled to it
+    preview_base = full_base.copy()
+    preview_base.thumbnail(BENCH_PREVIEW_SIZE, Image.Resampling.LANCZOS)
+    preview_scale = preview_base.height / full_base.height
+    preview_font_size = max(1, round(BENCH_BASELINE["size"] * preview_scale))
+    preview_text = legacy_texts[BENCH_BASELINE["text"]]
+    preview_ttf_path = os.path.join(fonts_folder, BENCH_BASELINE["font"])
+    preview_kwargs = {"font_color": "white", "qr_code_file_path": qr_code_file_path, "qr_margin": round(QR_CODE_MARGIN * preview_scale)}
+    preview_params = {"size": list(preview_base.size), "font_size": preview_font_size}
+    add("preview/new_text", "preview", dict(preview_params, change="text"),
+        lambda: LayeredOverlay(preview_base).render(preview_text, preview_ttf_path, preview_font_size, 20.0, **preview_kwargs))
+    warm_overlay = LayeredOverlay(preview_base)
+    offsets = iter(range(10**9))
+    add("preview/move_text", "preview", dict(preview_params, change="y_offset"),
+        lambda: warm_overlay.render(preview_text, preview_ttf_path, preview_font_size, 10.0 + next(offsets) % 50, **preview_kwargs))
+
+    encode_source = generate_overlayed_image(full_base, legacy_texts["medium"], preview_ttf_path, 100, 20.0, "white", qr_code_file_path)
+    for output_format, options in (("PNG", {"compress_level": 6}), ("PNG", {"compress_level": 1}), ("JPEG", {"quality": 90}), ("WEBP", {"quality": 90})):
+        option_label = ",".join(f"{key}={value}" for key, value in options.items())
+        add(f"encode/{output_format}/{option_label}", "encode", dict(options, format=output_format, size=list(encode_source.size)),
+            lambda: encode_image(encode_source, output_format, **options))
+
+    return {"meta": _suite_metadata(repeat), "results": results}
+
+def compare_suite_results(old_results, new_results, threshold=BENCH_REGRESSION_THRESHOLD):
+    """Prints per-case median changes between two bench_suite outputs and returns the names that regressed."""
+    old_by_name = {result["name"]: result for result in old_results["results"]}
+    regressions = []
+    print(f"{'case':<70} {'old ms':>9} {'new ms':>9} {'change':>8}")
+    for result in new_results["results"]:
+        old = old_by_name.get(result["name"])
+        if old is None or not old["median_ms"]:
+            continue
+        change = result["median_ms"] / old["median_ms"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(result["name"])
+            flag = " ⚠️"
+        print(f"{result['name']:<70} {old['median_ms']:>9.2f} {result['median_ms']:>9.2f} {change:>+7.1%}{flag}")
+    print(f"ℹ️ {len(regressions)} case(s) more than {threshold:.0%} slower "
+          f"({old_results['meta'].get('commit')} -> {new_results['meta'].get('commit')}).")
+    return regressions
+
+def _parse_importtime(stderr_text):
+    """{module: (self ms, cumulative ms)} from `python -X importtime` output."""
+    modules = {}
+    for line in stderr_text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return modules
+
+def bench_import_times(modules=BENCH_STARTUP_MODULES, repeat=5):
+    """Median cumulative import time of each module in a fresh interpreter, plus the slowest imports it pulls in."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for module in modules:
+        cumulative_ms = []
+        imported = {}
+        for _ in range(repeat):
+            completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                       capture_output=True, text=True, cwd=script_dir)
+            if completed.returncode != 0:
+                print(f"⚠️ Could not import {module}: {completed.stderr.strip().splitlines()[-1:]}")
+                break
+            imported = _parse_importtime(completed.stderr)
+            cumulative_ms.append(imported[module][1])
+        if not cumulative_ms:
+            continue
+        slowest = sorted(((name, self_ms) for name, (self_ms, _) in imported.items()), key=lambda item: -item[1])[:BENCH_IMPORT_TOP]
+        results[module] = {"median_ms": round(statistics.median(cumulative_ms), 3),
+                           "slowest_self_ms": {name: round(self_ms, 3) for name, self_ms in slowest}}
+    return results
+
+def _time_gui_startup_once():
+    """Wall ms from launching app.py to each milestone its startup probe prints, or {} if the GUI could not start."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    environment = dict(os.environ, **{BENCH_STARTUP_PROBE_ENV: "1"})
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(script_dir, "app.py")], cwd=script_dir, env=environment,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    milestones = {}
+    try:
+        for line in process.stdout:
+            if line.startswith("startup:"):
+                milestones[line.strip()[len("startup:"):]] = round((time.perf_counter() - start) * 1000, 3)
+            if "first_render" in milestones or time.perf_counter() - start > BENCH_STARTUP_TIMEOUT_S:
+                break
+    finally:
+        try:
+            process.wait(timeout=BENCH_STARTUP_TIMEOUT_S)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    if not milestones:
+        error_lines = process.stderr.read().strip().splitlines()
+        print(f"⚠️ GUI startup not measured: {error_lines[-1] if error_lines else 'no startup milestones printed'}")
+    process.stderr.close()
+    process.stdout.close()
+    return milestones
+
+def bench_startup(repeat=5):
+    """
+    Cold-start numbers: import times of the entry modules and, when a display is available, wall time from
+    launching the GUI to its first window and first render (the font sample preview).
+    """
+    results = {"meta": _suite_metadata(repeat), "imports": bench_import_times(repeat=repeat), "gui": {}}
+    runs = []
+    for _ in range(repeat):
+        milestones = _time_gui_startup_once()
+        if not milestones:
+            break
+        runs.append(milestones)
+    for milestone in ("first_window", "first_render"):
+        times_ms = [run[milestone] for run in runs if milestone in run]
+        if times_ms:
+            results["gui"][milestone] = {"median_ms": round(statistics.median(times_ms), 3), "min_ms": round(min(times_ms), 3)}
+    return results
+
+def print_startup_results(results):
+    for module, result in results["imports"].items():
+        slowest = ", ".join(f"{name} {self_ms:.1f}" for name, self_ms in list(result["slowest_self_ms"].items())[:5])
+        print(f"import {module:<14} {result['median_ms']:>8.1f} ms (slowest: {slowest})")
+    for milestone, result in results["gui"].items():
+        print(f"gui {milestone:<17} {result['median_ms']:>8.1f} ms (min {result['min_ms']:.1f})")
+
+if __name__ == "__main__":
+    # python benchmark.py [outline SIZE... | template [COUNT] | suite [OUTPUT.json] [REPEAT] | compare OLD.json NEW.json [THRESHOLD]
+    #                      | variants | startup [REPEAT]]
+    args = sys.argv[1:]
+    if args and args[0] == "variants":
+        print_variant_results(bench_variants())
+    elif args and args[0] == "startup":
+        print_startup_results(bench_startup(int(args[1]) if len(args) > 1 else 5))
+    elif args and args[0] == "suite":
+        output_path = args[1] if len(args) > 1 else None
+        with contextlib.redirect_stdout(sys.stderr): # Keep render diagnostics out of JSON printed to stdout
+            suite_results = bench_suite(int(args[2]) if len(args) > 2 else 5)
+        suite_json = json.dumps(suite_results, indent=2, ensure_ascii=False)
+        if output_path:
+            with open(output_path, "w", encoding="utf-8") as output_file:
+                output_file.write(suite_json + "\n")
+            print(f"✅ {len(suite_results['results'])} benchmark results written to {output_path}")
+        else:
+            print(suite_json)
+    elif args and args[0] == "compare":
+        with open(args[1], encoding="utf-8") as old_file, open(args[2], encoding="utf-8") as new_file:
+            old_results, new_results = json.load(old_file), json.load(new_file)
+        threshold = float(args[3]) if len(args) > 3 else BENCH_REGRESSION_THRESHOLD
+        sys.exit(1 if compare_suite_results(old_results, new_results, threshold) else 0)
+    elif args and args[0] == "template":
+        count = int(args[1]) if len(args) > 1 else 100
+        print_template_results(bench_template(count))
+    else:
+        if args and args[0] == "outline":
+            args = args[1:]
+        sizes = [int(arg) for arg in args] or BENCH_FONT_SIZES
+        print_outline_results(bench_outline(sizes))
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageDraw, ImageFont
+
+from font_utils import APP_CACHE_DIR
+
+# --- Gallery defaults ---
+GALLERY_FONT_SIZE = 20
+GALLERY_PADDING = 5
+GALLERY_CACHE_VERSION = 1 # Bump when the sample rendering changes so old thumbnails are not reused
+DEFAULT_GALLERY_CACHE_DIR = os.path.join(APP_CACHE_DIR, "font_gallery")
+
+_font_hashes = {} # (path, mtime, size) -> sha1 of the file
+_font_hashes_lock = threading.Lock()
+
+def get_font_file_hash(ttf_path):
+    """sha1 of the font file's contents, remembered per (path, mtime, size) so each file is read once per run."""
+    stat = os.stat(ttf_path)
+    key = (os.path.abspath(ttf_path), stat.st_mtime, stat.st_size)
+    with _font_hashes_lock:
+        cached = _font_hashes.get(key)
+    if cached is not None:
+        return cached
+    digest = hashlib.sha1()
+    with open(ttf_path, "rb") as font_file:
+        for chunk in iter(lambda: font_file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    with _font_hashes_lock:
+        _font_hashes[key] = digest.hexdigest()
+    return _font_hashes[key]
+
+def render_sample_mask(ttf_path, sample_text, font_size=GALLERY_FONT_SIZE, padding=GALLERY_PADDING):
+    """Rasterizes the sample text into a tight L-mode coverage mask with `padding` pixels around it."""
+    # Loaded directly rather than through the font registry so browsing hundreds of fonts does not evict the ones in use
+    font = ImageFont.truetype(ttf_path, font_size)
+    measure = ImageDraw.Draw(Image.new("L", (1, 1)))
+    text_bbox = measure.textbbox((0, 0), sample_text, font=font)
+    mask = Image.new("L", (max(1, text_bbox[2] - text_bbox[0]) + 2 * padding, max(1, text_bbox[3] - text_bbox[1]) + 2 * padding), 0)
+    ImageDraw.Draw(mask).text((padding - text_bbox[0], padding - text_bbox[1]), sample_text, font=font, fill=255)
+    return mask
+
+def colorize_sample(mask, color):
+    """The recolor step: a transparent RGBA thumbnail of the mask in `color`."""
+    thumbnail = Image.new("RGBA", mask.size, color)
+    thumbnail.putalpha(mask)
+    return thumbnail
+
+class FontGallery:
+    """
+    Sample thumbnails for many fonts, built on a thread pool. Each font's coverage mask is kept in memory and
+    on disk under a key made of the font file hash, size and sample text, so later launches only read small
+    PNGs. Masks are color-independent: a color change only reruns colorize_sample.
+    """
+
+    def __init__(self, sample_text, cache_dir=DEFAULT_GALLERY_CACHE_DIR, font_size=GALLERY_FONT_SIZE, workers=None):
+        self.sample_text = sample_text
+        self.cache_dir = cache_dir
+        self.font_size = font_size
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 2) # File reads and hashing overlap well with rendering
+        self._masks = {} # ttf_path -> mask
+        self._lock = threading.Lock()
+        self._executor = None
+        self._cache_write_failed = False
+
+    def _cache_path(self, ttf_path):
+        key_text = f"{get_font_file_hash(ttf_path)}|{self.font_size}|{self.sample_text}|{GALLERY_CACHE_VERSION}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key_text.encode("utf-8")).hexdigest() + ".png")
+
+    def _write_cache(self, cache_path, mask):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            mask.save(temp_path, "PNG")
+            os.replace(temp_path, cache_path) # Readers never see a half-written thumbnail
+        except OSError as e:
+            if not self._cache_write_failed: # One warning is enough for a read-only cache folder
+                self._cache_write_failed = True
+                print(f"⚠️ Could not write font gallery cache in '{self.cache_dir}': {e}")
+
+    def get_mask(self, ttf_path):
+        """The font's sample mask from memory, the disk cache, or a fresh render. Raises OSError for unreadable fonts."""
+        with self._lock:
+            mask = self._masks.get(ttf_path)
+        if mask is not None:
+            return mask
+        cache_path = self._cache_path(ttf_path)
+        mask = None
+        if os.path.exists(cache_path):
+            try:
+                with Image.open(cache_path) as cached:
+                    mask = cached.convert("L")
+            except OSError:
+                mask = None # Corrupt entry; render it again below
+        if mask is None:
+            mask = render_sample_mask(ttf_path, self.sample_text, self.font_size)
+            self._write_cache(cache_path, mask)
+        with self._lock:
+            self._masks[ttf_path] = mask
+        return mask
+
+    def get_loaded_mask(self, ttf_path):
+        """The mask if it is already in memory, else None. Never touches the disk."""
+        with self._lock:
+            return self._masks.get(ttf_path)
+
+    def _build_one(self, ttf_path, on_mask):
+        try:
+            mask, error = self.get_mask(ttf_path), None
+        except Exception as e:
+            mask, error = None, e
+        if on_mask:
+            on_mask(ttf_path, mask, error)
+
+    def build(self, font_paths, on_mask=None):
+        """
+        Loads or renders masks for all fonts in the background. on_mask(ttf_path, mask, error) is called on a
+        pool thread as each one finishes, in completion order. Returns the futures.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="font-gallery")
+        return [self._executor.submit(self._build_one, ttf_path, on_mask) for ttf_path in font_paths]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
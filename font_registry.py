@@ -0,0 +1,105 @@
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont
+
+from render_timing import stage_timer, STAGE_FONT_LOAD, STAGE_LAYOUT
+
+# --- Cache limits ---
+DEFAULT_FONT_CACHE_BYTES = 64 * 1024 * 1024 # Approximate memory for loaded fonts (sum of their file sizes)
+DEFAULT_BBOX_CACHE_SIZE = 4096 # (font, size, text) layout results kept
+
+class FontRegistry:
+    """
+    Shared cache of loaded FreeTypeFont objects keyed by (path, size), evicted least-recently-used once the
+    loaded fonts exceed max_bytes, plus a cache of textbbox results keyed by (path, size, text, align).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_FONT_CACHE_BYTES, max_bbox_entries=DEFAULT_BBOX_CACHE_SIZE):
+        self.max_bytes = max_bytes
+        self.max_bbox_entries = max_bbox_entries
+        self._fonts = OrderedDict() # (path, size) -> (font, estimated bytes)
+        self._font_bytes = 0
+        self._bboxes = OrderedDict() # (path, size, text, align) -> bbox
+        self._lock = threading.RLock()
+        self._measure_draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+        self._stats = {"font_hits": 0, "font_loads": 0, "font_evictions": 0, "bbox_hits": 0, "bbox_misses": 0}
+
+    def get_font(self, ttf_path, font_size_px):
+        """Returns a cached FreeTypeFont, loading it on first use. Raises OSError like ImageFont.truetype."""
+        key = (ttf_path, font_size_px)
+        with self._lock:
+            cached = self._fonts.get(key)
+            if cached is not None:
+                self._fonts.move_to_end(key)
+                self._stats["font_hits"] += 1
+                return cached[0]
+
+            with stage_timer(STAGE_FONT_LOAD):
+                font = ImageFont.truetype(ttf_path, font_size_px)
+            estimated_bytes = os.path.getsize(ttf_path)
+            self._fonts[key] = (font, estimated_bytes)
+            self._font_bytes += estimated_bytes
+            self._stats["font_loads"] += 1
+            # Always keep the font just loaded, even if it alone is over the cap
+            while self._font_bytes > self.max_bytes and len(self._fonts) > 1:
+                evicted_key, (_, evicted_bytes) = self._fonts.popitem(last=False)
+                self._font_bytes -= evicted_bytes
+                self._stats["font_evictions"] += 1
+                self._drop_bboxes(evicted_key)
+            return font
+
+    def _drop_bboxes(self, font_key):
+        # Caller holds self._lock
+        for bbox_key in [k for k in self._bboxes if k[:2] == font_key]:
+            del self._bboxes[bbox_key]
+
+    def get_text_bbox(self, ttf_path, font_size_px, text, align="left"):
+        """Cached ImageDraw.textbbox((0, 0), text, align=align) for the font at this size."""
+        key = (ttf_path, font_size_px, text, align)
+        with self._lock:
+            bbox = self._bboxes.get(key)
+            if bbox is not None:
+                self._bboxes.move_to_end(key)
+                self._stats["bbox_hits"] += 1
+                return bbox
+
+            font = self.get_font(ttf_path, font_size_px)
+            with stage_timer(STAGE_LAYOUT):
+                bbox = self._measure_draw.textbbox((0, 0), text, font=font, align=align)
+            self._bboxes[key] = bbox
+            self._stats["bbox_misses"] += 1
+            while len(self._bboxes) > self.max_bbox_entries:
+                self._bboxes.popitem(last=False)
+            return bbox
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["fonts"] = len(self._fonts)
+            stats["font_bytes"] = self._font_bytes
+            stats["bboxes"] = len(self._bboxes)
+            return stats
+
+    def clear(self):
+        with self._lock:
+            self._fonts.clear()
+            self._bboxes.clear()
+            self._font_bytes = 0
+
+_registry = FontRegistry()
+
+def configure_font_registry(max_bytes=DEFAULT_FONT_CACHE_BYTES, max_bbox_entries=DEFAULT_BBOX_CACHE_SIZE):
+    """Replaces the shared registry with one using the given limits."""
+    global _registry
+    _registry = FontRegistry(max_bytes=max_bytes, max_bbox_entries=max_bbox_entries)
+    return _registry
+
+def get_font_registry():
+    return _registry
+
+def get_font(ttf_path, font_size_px):
+    return _registry.get_font(ttf_path, font_size_px)
+
+def get_text_bbox(ttf_path, font_size_px, text, align="left"):
+    return _registry.get_text_bbox(ttf_path, font_size_px, text, align)
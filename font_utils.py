@@ -1,6 +1,28 @@
+import json
 import os
-import requests
 import sys # For resource_path if it were to be used here, but it's more general
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from sinhala_converter import convert_unicode_to_legacy_local, LOCAL_OUTPUT_FORMATS
+from render_timing import stage_timer, STAGE_CONVERT
+
+FONTS_FOLDER = "fonts" # Folder relative to the script where TTF files are stored
+APP_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "sinhala_image_app")
+DEFAULT_FONT_INDEX_PATH = os.path.join(APP_CACHE_DIR, "font_index.json")
+FONT_INDEX_VERSION = 1
+
+CONVERSION_BACKEND_AUTO = "auto"
+CONVERSION_BACKEND_LOCAL = "local"
+CONVERSION_BACKEND_REMOTE = "remote"
+CONVERSION_BACKEND_ENV = "SINHALA_CONVERSION_BACKEND" # e.g. "auto" to opt into offline conversion; worker processes inherit it
+# The web API stays the default until the offline table has been checked against a recorded golden corpus
+# (python sinhala_converter.py record/check, see transliteration_corpus.txt)
+DEFAULT_CONVERSION_BACKEND = os.environ.get(CONVERSION_BACKEND_ENV) or CONVERSION_BACKEND_REMOTE
+
+DEFAULT_CONVERSION_CACHE_SIZE = 1024 # (text, output_format) entries kept in memory
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -22,7 +44,78 @@ def find_ttf_fonts(folder_path):
                 font_files.append(os.path.join(folder_path, filename))
     return font_files
 
-def convert_unicode_to_legacy(text, output_format="font"):  # options: unicode, font, isi
+def _get_font_folder_key(folder_path):
+    """
+    (key, stamp) identifying the folder's listing. Normally the folder path and its mtime, which changes when
+    files are added, removed or renamed. A frozen build unpacks its fonts to a fresh _MEIPASS folder on each
+    launch, so bundled folders are keyed by the executable instead.
+    """
+    folder_path = os.path.abspath(folder_path)
+    bundle_dir = getattr(sys, "_MEIPASS", None)
+    if getattr(sys, "frozen", False) and bundle_dir and folder_path.startswith(os.path.abspath(bundle_dir) + os.sep):
+        return f"frozen:{sys.executable}:{os.path.relpath(folder_path, bundle_dir)}", os.stat(sys.executable).st_mtime_ns
+    return folder_path, os.stat(folder_path).st_mtime_ns
+
+def _read_font_index(index_path):
+    try:
+        with open(index_path, encoding="utf-8") as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or index.get("version") != FONT_INDEX_VERSION:
+        return {}
+    return index.get("folders", {})
+
+def _write_font_index(index_path, folders):
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as index_file:
+            json.dump({"version": FONT_INDEX_VERSION, "folders": folders}, index_file, ensure_ascii=False)
+        os.replace(temp_path, index_path) # Concurrent launches never read a half-written index
+    except OSError as e:
+        print(f"⚠️ Could not write font index '{index_path}': {e}")
+
+def find_ttf_fonts_cached(folder_path, index_path=DEFAULT_FONT_INDEX_PATH):
+    """
+    find_ttf_fonts backed by an on-disk index of file names, reused while the folder's mtime is unchanged,
+    so launches skip the directory scan. Same result order as the scan that built the index.
+    """
+    if not os.path.isdir(folder_path):
+        return []
+    try:
+        folder_key, stamp = _get_font_folder_key(folder_path)
+    except OSError:
+        return find_ttf_fonts(folder_path)
+    folders = _read_font_index(index_path)
+    entry = folders.get(folder_key)
+    if entry and entry.get("stamp") == stamp:
+        return [os.path.join(folder_path, filename) for filename in entry["fonts"]]
+    font_files = find_ttf_fonts(folder_path)
+    folders[folder_key] = {"stamp": stamp, "fonts": [os.path.basename(font_file) for font_file in font_files]}
+    _write_font_index(index_path, folders)
+    return font_files
+
+def convert_unicode_to_legacy(text, output_format="font", backend=None):  # options: unicode, font, isi
+    """
+    Converts Sinhala Unicode text for the legacy fonts.
+    backend: "local" converts offline only, "remote" always calls the web API, and "auto" converts offline
+    when the format is supported locally and falls back to the web API otherwise. The default is "remote",
+    or the SINHALA_CONVERSION_BACKEND environment variable when set.
+    """
+    backend = backend or DEFAULT_CONVERSION_BACKEND
+    if backend not in (CONVERSION_BACKEND_AUTO, CONVERSION_BACKEND_LOCAL, CONVERSION_BACKEND_REMOTE):
+        raise ValueError(f"Unknown conversion backend '{backend}'.")
+    with stage_timer(STAGE_CONVERT):
+        if backend != CONVERSION_BACKEND_REMOTE and output_format in LOCAL_OUTPUT_FORMATS:
+            return convert_unicode_to_legacy_local(text, output_format)
+        if backend == CONVERSION_BACKEND_LOCAL:
+            raise Exception(f"Offline conversion does not support the '{output_format}' format.")
+        return _conversion_cache.get_or_convert(text, output_format, convert_unicode_to_legacy_remote)
+
+def convert_unicode_to_legacy_remote(text, output_format="font"):
+    import requests # Imported on first use: it is the heaviest import in the app, so launching and offline backends never pay for it
+
     url = 'https://singlish.kdj.lk/api.php'
     payload = {
         'text': text,
@@ -43,3 +136,158 @@ def convert_unicode_to_legacy(text, output_format="font"):  # options: unicode,
         raise Exception("Sinhala text conversion API request timed out.")
     except requests.exceptions.RequestException as e:
         raise Exception(f"Sinhala text conversion API request failed: {e}")
+
+class ConversionCache:
+    """
+    Cache for slow conversions keyed by (text, output_format): an in-memory LRU, optionally backed by
+    a sqlite file that survives restarts and is shared by batch workers. Concurrent requests for a key
+    that is already being converted wait for that conversion instead of starting their own.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CONVERSION_CACHE_SIZE, db_path=None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock() # Guards the entries, in-flight Futures and stats
+        self._db_lock = threading.Lock() # Serializes use of the shared sqlite connection
+        self._db = None
+        if db_path:
+            import sqlite3
+            self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS conversions "
+                             "(text TEXT NOT NULL, format TEXT NOT NULL, result TEXT NOT NULL, PRIMARY KEY (text, format))")
+            self._db.commit()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "errors": 0, "disk_errors": 0, "convert_seconds": 0.0}
+
+    def _remember(self, key, result):
+        # Caller holds self._lock
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_convert(self, text, output_format, convert):
+        key = (text, output_format)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key]
+            pending = self._in_flight.get(key)
+            if pending is None:
+                pending = Future()
+                self._in_flight[key] = pending
+                owner = True
+            else:
+                owner = False
+                self._stats["coalesced"] += 1
+
+        if not owner:
+            return pending.result() # Re-raises the owner's error, if any
+
+        # The owner does the disk lookup, conversion and disk write outside self._lock, so a sqlite file
+        # locked by another worker only holds up this key, never in-memory hits for other keys
+        try:
+            row = self._read_disk(key)
+            if row is not None:
+                result = row[0]
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                    self._remember(key, result)
+            else:
+                result = self._convert(key, convert)
+                self._write_disk(key, result)
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            self._in_flight.pop(key, None)
+        pending.set_result(result)
+        return result
+
+    def _convert(self, key, convert):
+        with self._lock:
+            self._stats["misses"] += 1
+        start = time.perf_counter()
+        try:
+            result = convert(*key)
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats["convert_seconds"] += elapsed
+            self._remember(key, result) # Kept in memory first; the disk write may still fail
+        return result
+
+    def _count_disk_error(self, action, error):
+        with self._lock:
+            self._stats["disk_errors"] += 1
+        print(f"⚠️ Conversion cache {action} '{self.db_path}' failed: {error}")
+
+    def _read_disk(self, key):
+        # A failed read (e.g. the file is locked by another worker) is just a miss
+        import sqlite3
+        with self._db_lock:
+            if self._db is None:
+                return None
+            try:
+                return self._db.execute("SELECT result FROM conversions WHERE text = ? AND format = ?", key).fetchone()
+            except sqlite3.Error as e:
+                error = e
+        self._count_disk_error("read from", error)
+        return None
+
+    def _write_disk(self, key, result):
+        # The result is already in memory, so a failed write only costs a later re-conversion
+        import sqlite3
+        with self._db_lock:
+            if self._db is None:
+                return
+            try:
+                self._db.execute("INSERT OR REPLACE INTO conversions (text, format, result) VALUES (?, ?, ?)", key + (result,))
+                self._db.commit()
+                return
+            except sqlite3.Error as e:
+                error = e
+                try:
+                    self._db.rollback()
+                except sqlite3.Error:
+                    pass
+        self._count_disk_error("write to", error)
+
+    def stats(self):
+        """Counters plus the mean latency of conversions that actually ran."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        converted = stats["misses"] - stats["errors"]
+        stats["mean_convert_ms"] = stats["convert_seconds"] * 1000 / converted if converted > 0 else 0.0
+        return stats
+
+    def clear(self):
+        """Drops the in-memory entries; the on-disk store is kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+_conversion_cache = ConversionCache()
+
+def configure_conversion_cache(max_entries=DEFAULT_CONVERSION_CACHE_SIZE, db_path=None):
+    """Replaces the shared conversion cache, e.g. to add an on-disk store."""
+    global _conversion_cache
+    _conversion_cache.close()
+    _conversion_cache = ConversionCache(max_entries=max_entries, db_path=db_path)
+    return _conversion_cache
+
+def get_conversion_cache_stats():
+    return _conversion_cache.stats()
@@ -1,15 +1,24 @@
 import tkinter as tk
 from tkinter import Scale, filedialog, ttk, font as tkfont, colorchooser
-from PIL import Image, ImageDraw, ImageFont, ImageTk
+from PIL import ImageTk
 import os
+import queue
 import sys # For resource_path
+from concurrent.futures import ThreadPoolExecutor
 
 # Assuming image_utils.py and font_utils.py are in the same directory or accessible via PYTHONPATH
-from image_utils import generate_overlayed_image 
-from font_utils import find_ttf_fonts, convert_unicode_to_legacy
+from image_utils import generate_overlayed_image, LayeredOverlay, load_image, get_image_size, QR_CODE_MARGIN
+from font_utils import find_ttf_fonts_cached, convert_unicode_to_legacy, FONTS_FOLDER
+from text_layout import fit_text_to_image, TEXT_ALIGN_CENTER
+from output_utils import save_image
+from font_gallery import FontGallery, colorize_sample
 
-FONTS_FOLDER = "fonts" # Folder relative to the script where TTF files are stored
 SAMPLE_PREVIEW_TEXT = "úys¿ kï b;sx weïv ;uhs''" 
+PREVIEW_DEBOUNCE_MS = 150 # Quiet time after the last change before the live preview re-renders
+PREVIEW_POLL_MS = 30 # How often the Tk thread checks for a finished preview render
+GALLERY_POLL_MS = 50 # How often the Tk thread picks up finished font gallery thumbnails
+GALLERY_WINDOW_GEOMETRY = "420x600"
+STARTUP_PROBE_ENV = "SINHALA_APP_STARTUP_PROBE" # When set, print startup milestones and quit after the first render (benchmark.py startup)
 def resource_path(relative_path):
     try:
         base_path = sys._MEIPASS
@@ -24,28 +33,82 @@ class LiveViewApp:
         master.title("Sinhala Unicode to TTF Image App")
 
         self.image_path_var = tk.StringVar(value="No image selected")
-        self.base_pil_image = None
+        self.base_image_path = None # Full resolution is only decoded on download
+        self.base_image_size = None
         self.current_tk_image = None 
 
         self.MAX_PREVIEW_WIDTH = 800 
         self.MAX_PREVIEW_HEIGHT = 600
 
-        self.available_fonts = find_ttf_fonts(resource_path(FONTS_FOLDER))
-        if not self.available_fonts:
-            print(f"❌ Error: No .ttf fonts found in '{FONTS_FOLDER}'. Please place font files in this folder.")
-            master.destroy()
-            return
-        
-        self.selected_font_path = self.available_fonts[0]
+        # Live preview: renders run on a worker thread against a downscaled copy of the base image
+        self.preview_base_image = None
+        self.preview_scale = 1.0
+        self._preview_overlay = None # Cached text/QR layers over preview_base_image
+        self._preview_after_id = None
+        self._preview_poll_after_id = None
+        self._preview_generation = 0 # Bumped per request; workers skip or drop anything older
+        self._preview_results = queue.Queue()
+        self._preview_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview")
+        self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save") # Encodes downloads off the Tk thread
+
+        # Fonts are discovered once the window is on screen (see _discover_fonts)
+        self.available_fonts = []
+        self.selected_font_path = None
+        self._startup_probe = bool(os.environ.get(STARTUP_PROBE_ENV))
+        self._startup_milestones = set()
+        self._font_discovery_scheduled = False
+
+        # Font gallery: sample thumbnails for every font, loaded or rendered on a pool and shown as they arrive
+        self.font_gallery = FontGallery(SAMPLE_PREVIEW_TEXT)
+        self._gallery_results = queue.Queue()
+        self._gallery_pending = 0
+        self._gallery_failed = set()
+        self._gallery_window = None
+        self._gallery_rows = {} # ttf_path -> Label in the gallery window
+        self._gallery_photos = {} # ttf_path -> PhotoImage; Tk drops images nothing references
 
         initial_font_size = 100 
         self.font_size_var = tk.IntVar(value=initial_font_size)
         self.text_y_offset_var = tk.DoubleVar(value=20.0) 
         self.font_color_var = tk.StringVar(value="#000000") 
         self.qr_code_path_var = tk.StringVar(value="") 
+        self.live_preview_var = tk.BooleanVar(value=True)
+        self.auto_fit_var = tk.BooleanVar(value=False) # Wrap and size the text to fit; the slider becomes the largest size
 
         self._build_ui()
 
+        for setting_var in (self.font_size_var, self.text_y_offset_var, self.font_color_var, self.qr_code_path_var):
+            setting_var.trace_add("write", self._on_setting_changed)
+        master.protocol("WM_DELETE_WINDOW", self._on_close)
+        master.bind("<Map>", self._on_first_map, add="+")
+
+    def _report_startup(self, milestone):
+        if self._startup_probe and milestone not in self._startup_milestones:
+            self._startup_milestones.add(milestone)
+            print(f"startup:{milestone}", flush=True)
+
+    def _on_first_map(self, event):
+        # The toplevel's bindings also fire for every child widget being mapped
+        if event.widget is not self.master or self._font_discovery_scheduled:
+            return
+        self._font_discovery_scheduled = True
+        self._report_startup("first_window")
+        # Idle callbacks queued now run after the redraws the map just scheduled, i.e. after the first paint
+        self.master.after_idle(self._discover_fonts)
+
+    def _discover_fonts(self):
+        self.available_fonts = find_ttf_fonts_cached(resource_path(FONTS_FOLDER))
+        if not self.available_fonts:
+            print(f"❌ Error: No .ttf fonts found in '{FONTS_FOLDER}'. Please place font files in this folder.")
+            self._on_close()
+            return
+        self.selected_font_path = self.available_fonts[0]
+        self.font_combobox.config(values=[os.path.basename(f) for f in self.available_fonts])
+        self.font_combobox.set(os.path.basename(self.selected_font_path))
+        self.font_gallery_button.config(state=tk.NORMAL)
+        self._start_font_gallery()
+        self.update_font_preview()
+
     def _build_ui(self):
         master = self.master
 
@@ -55,11 +118,14 @@ class LiveViewApp:
 
         self.font_label = tk.Label(font_selection_frame, text="Select Font:")
         self.font_label.pack(side=tk.LEFT, pady=(0,0))
-        font_filenames = [os.path.basename(f) for f in self.available_fonts]
-        self.font_combobox = ttk.Combobox(font_selection_frame, values=font_filenames, state="readonly", width=30)
-        self.font_combobox.set(font_filenames[0]) 
+        self.font_combobox = ttk.Combobox(font_selection_frame, values=[], state="readonly", width=30) # Filled by _discover_fonts
         self.font_combobox.pack(side=tk.LEFT, padx=(5,10), pady=(0,0))
         self.font_combobox.bind("<<ComboboxSelected>>", self.update_font_preview)
+        self.font_combobox.bind("<<ComboboxSelected>>", self._on_setting_changed, add="+")
+
+        self.font_gallery_button = tk.Button(font_selection_frame, text="Font Gallery", command=self.open_font_gallery)
+        self.font_gallery_button.pack(side=tk.LEFT, padx=(0,10))
+        self.font_gallery_button.config(state=tk.DISABLED) # Until fonts are discovered
 
         self.font_preview_label = tk.Label(font_selection_frame, text=SAMPLE_PREVIEW_TEXT, font=("Arial", 16))
         self.font_preview_label.pack(side=tk.LEFT, pady=(0,0))
@@ -85,6 +151,8 @@ class LiveViewApp:
         self.text_input_widget = tk.Text(master, height=4, width=50, font=('Arial', 10), wrap=tk.WORD)
         self.text_input_widget.insert(tk.END, "සිංහල පෙළ\nමෙහි යොදන්න") 
         self.text_input_widget.pack(fill=tk.X, padx=20, pady=(5, 10)) 
+        self.text_input_widget.edit_modified(False) # The sample text above is not a user edit
+        self.text_input_widget.bind("<<Modified>>", self._on_text_modified)
         self.text_input_widget.config(state=tk.DISABLED)
         self.font_combobox.config(state=tk.DISABLED)
 
@@ -107,6 +175,12 @@ class LiveViewApp:
         self.color_button.pack(side=tk.LEFT, padx=5)
         self.color_button.config(state=tk.DISABLED) 
 
+        self.live_preview_checkbox = tk.Checkbutton(button_frame, text="Live Preview", variable=self.live_preview_var, command=self._on_setting_changed)
+        self.live_preview_checkbox.pack(side=tk.LEFT, padx=5)
+
+        self.auto_fit_checkbox = tk.Checkbutton(button_frame, text="Auto-fit Text", variable=self.auto_fit_var, command=self._on_setting_changed)
+        self.auto_fit_checkbox.pack(side=tk.LEFT, padx=5)
+
         self.image_label = tk.Label(master)
         self.image_label.pack(pady=(0, 10), padx=10) 
 
@@ -122,22 +196,109 @@ class LiveViewApp:
         if new_selected_font_path:
             self.selected_font_path = new_selected_font_path 
             try:
-                sample_text = SAMPLE_PREVIEW_TEXT
-                font_size = 20 
                 current_font_color = self.font_color_var.get() 
-                pil_font = ImageFont.truetype(self.selected_font_path, font_size)
-                dummy_draw = ImageDraw.Draw(Image.new("RGBA", (1,1)))
-                text_bbox = dummy_draw.textbbox((0,0), sample_text, font=pil_font)
-                text_width = text_bbox[2] - text_bbox[0]
-                text_height = text_bbox[3] - text_bbox[1]
-                preview_pil_image = Image.new("RGBA", (text_width + 10, text_height + 10), (0,0,0,0)) 
-                draw_preview = ImageDraw.Draw(preview_pil_image)
-                draw_preview.text((5, 5 - text_bbox[1]), sample_text, font=pil_font, fill=current_font_color) 
+                # The gallery keeps the sample mask (usually from its disk cache), so only the recolor runs here
+                preview_pil_image = colorize_sample(self.font_gallery.get_mask(self.selected_font_path), current_font_color)
                 LiveViewApp._font_preview_photo_image = ImageTk.PhotoImage(preview_pil_image) 
                 self.font_preview_label.config(image=LiveViewApp._font_preview_photo_image, text="") 
+                self._on_first_render()
             except Exception as e: 
                 print(f"⚠️ Error generating font preview image: {e}.")
                 self.font_preview_label.config(image=None, text="Preview N/A") 
+        self._refresh_gallery_selection()
+
+    def _on_first_render(self):
+        if not self._startup_probe or "first_render" in self._startup_milestones:
+            return
+        self.master.update_idletasks() # Count the paint of the sample, not just building it
+        self._report_startup("first_render")
+        self.master.after_idle(self._on_close)
+
+    def _start_font_gallery(self):
+        self._gallery_pending = len(self.available_fonts)
+        self.font_gallery.build(self.available_fonts, lambda ttf_path, mask, error: self._gallery_results.put((ttf_path, error)))
+        self.master.after(GALLERY_POLL_MS, self._poll_gallery_results)
+
+    def _poll_gallery_results(self):
+        # Runs on the Tk thread; gallery workers only put (path, error) on the queue
+        while True:
+            try:
+                ttf_path, error = self._gallery_results.get_nowait()
+            except queue.Empty:
+                break
+            self._gallery_pending -= 1
+            if error is not None:
+                self._gallery_failed.add(ttf_path)
+                print(f"⚠️ Font gallery could not render '{os.path.basename(ttf_path)}': {error}")
+            self._update_gallery_row(ttf_path)
+        if self._gallery_pending > 0:
+            self.master.after(GALLERY_POLL_MS, self._poll_gallery_results)
+
+    def open_font_gallery(self):
+        if self._gallery_window is not None and self._gallery_window.winfo_exists():
+            self._gallery_window.lift()
+            return
+        window = tk.Toplevel(self.master)
+        window.title("Font Gallery")
+        window.geometry(GALLERY_WINDOW_GEOMETRY)
+        window.protocol("WM_DELETE_WINDOW", self._close_font_gallery)
+
+        canvas = tk.Canvas(window, highlightthickness=0)
+        scrollbar = tk.Scrollbar(window, orient=tk.VERTICAL, command=canvas.yview)
+        rows_frame = tk.Frame(canvas)
+        rows_frame.bind("<Configure>", lambda event: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=rows_frame, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        window.bind("<MouseWheel>", lambda event: canvas.yview_scroll(-1 if event.delta > 0 else 1, "units"))
+        window.bind("<Button-4>", lambda event: canvas.yview_scroll(-1, "units")) # X11 wheel up
+        window.bind("<Button-5>", lambda event: canvas.yview_scroll(1, "units"))
+
+        self._gallery_window = window
+        self._gallery_rows = {}
+        self._gallery_photos = {}
+        for ttf_path in self.available_fonts:
+            row = tk.Label(rows_frame, text=f"{os.path.basename(ttf_path)} (loading...)", compound=tk.TOP, anchor="w",
+                           justify=tk.LEFT, cursor="hand2", borderwidth=1)
+            row.pack(fill=tk.X, padx=5, pady=2)
+            row.bind("<Button-1>", lambda event, path=ttf_path: self._select_gallery_font(path))
+            self._gallery_rows[ttf_path] = row
+            self._update_gallery_row(ttf_path)
+        self._refresh_gallery_selection()
+
+    def _close_font_gallery(self):
+        self._gallery_window.destroy()
+        self._gallery_window = None
+        self._gallery_rows = {}
+        self._gallery_photos = {}
+
+    def _update_gallery_row(self, ttf_path):
+        row = self._gallery_rows.get(ttf_path)
+        if row is None:
+            return # Gallery window not open
+        if ttf_path in self._gallery_failed:
+            row.config(text=f"{os.path.basename(ttf_path)} (preview N/A)")
+            return
+        mask = self.font_gallery.get_loaded_mask(ttf_path)
+        if mask is None:
+            return # Still loading; the poll loop updates it when it arrives
+        photo = ImageTk.PhotoImage(colorize_sample(mask, self.font_color_var.get()))
+        self._gallery_photos[ttf_path] = photo
+        row.config(image=photo, text=os.path.basename(ttf_path))
+
+    def _recolor_gallery(self):
+        for ttf_path in self._gallery_rows:
+            self._update_gallery_row(ttf_path)
+
+    def _refresh_gallery_selection(self):
+        for ttf_path, row in self._gallery_rows.items():
+            row.config(relief=tk.SOLID if ttf_path == self.selected_font_path else tk.FLAT)
+
+    def _select_gallery_font(self, ttf_path):
+        self.font_combobox.set(os.path.basename(ttf_path))
+        self.update_font_preview()
+        self._on_setting_changed()
 
     def select_qr_code(self):
         file_path = filedialog.askopenfilename(
@@ -158,6 +319,7 @@ class LiveViewApp:
             self.font_color_var.set(hex_code)
             print(f"ℹ️ Font color set to {hex_code}")
             self.update_font_preview()
+            self._recolor_gallery() # Masks are cached; only the recolor runs
 
     def find_image(self):
         file_path = filedialog.askopenfilename(
@@ -166,10 +328,15 @@ class LiveViewApp:
         )
         if file_path: 
             try:
-                self.base_pil_image = Image.open(file_path).convert("RGBA")
+                # Preview renders work on a copy decoded at preview size, so their cost follows the preview area
+                self.preview_base_image = load_image(file_path, (self.MAX_PREVIEW_WIDTH, self.MAX_PREVIEW_HEIGHT))
+                self.base_image_path = file_path
+                self.base_image_size = get_image_size(file_path)
                 self.image_path_var.set(os.path.basename(file_path)) 
+                self.preview_scale = self.preview_base_image.height / self.base_image_size[1]
+                self._preview_overlay = LayeredOverlay(self.preview_base_image)
 
-                img_width, img_height = self.base_pil_image.size
+                img_width, img_height = self.base_image_size
                 slider_min_font_size = 10
                 slider_max_font_size = int(img_height * 0.8)
                 slider_length = max(300, int(img_width * 0.8))
@@ -191,54 +358,124 @@ class LiveViewApp:
             except Exception as e:
                 print(f"❌ Error loading image '{file_path}': {e}")
 
+    def _on_setting_changed(self, *args):
+        if self.live_preview_var.get() and self.preview_base_image:
+            self.schedule_preview()
+
+    def _on_text_modified(self, event=None):
+        if not self.text_input_widget.edit_modified():
+            return # Fired by the reset below
+        self.text_input_widget.edit_modified(False) # Re-arm <<Modified>> for the next edit
+        self._on_setting_changed()
+
+    def schedule_preview(self, delay_ms=PREVIEW_DEBOUNCE_MS):
+        """Debounces preview renders: a burst of changes produces one render once they stop."""
+        if self._preview_after_id is not None:
+            self.master.after_cancel(self._preview_after_id)
+        self._preview_after_id = self.master.after(delay_ms, self.update_display)
+
     def update_display(self):
+        """Reads the current settings and hands a preview-resolution render to the worker thread."""
+        if self._preview_after_id is not None:
+            self.master.after_cancel(self._preview_after_id) # Covers any change still waiting on the debounce
+            self._preview_after_id = None
         selected_font_filename = self.font_combobox.get()
         self.selected_font_path = next((f for f in self.available_fonts if os.path.basename(f) == selected_font_filename), None)
 
-        if not self.base_pil_image or not self.selected_font_path:
+        if not self.base_image_path or not self.selected_font_path:
             print("⚠️ Update display called before base image or selected font is ready.")
             return
 
-        current_unicode_text = self.text_input_widget.get("1.0", tk.END).strip() 
-        legacy_text_to_draw = ""
-        if current_unicode_text:
-            try:
-                legacy_text_to_draw = convert_unicode_to_legacy(current_unicode_text)
-            except Exception as e:
-                print(f"❌ Error converting Sinhala text: {e}. Please check your input or API connection.")
-                # Display image without text if conversion fails
-        
-        current_font_size = self.font_size_var.get()
-        current_text_y_offset = self.text_y_offset_var.get()
-        current_font_color = self.font_color_var.get() 
-        current_qr_path = self.qr_code_path_var.get()
-
-        if current_font_size <= 0 and legacy_text_to_draw: # Only an issue if there's text
-             print("⚠️ Font size is not positive. Cannot render text.")
-             # Still generate image with QR if selected
-             processed_pil_image = generate_overlayed_image(self.base_pil_image, "", self.selected_font_path, 1, text_y_offset_percent=current_text_y_offset, font_color=current_font_color, qr_code_file_path=current_qr_path)
-        else:
-            processed_pil_image = generate_overlayed_image(
-                self.base_pil_image, 
-                legacy_text_to_draw, 
-                self.selected_font_path, 
-                current_font_size if legacy_text_to_draw else 1, # Use 1 if no text to avoid error with font size 0
-                text_y_offset_percent=current_text_y_offset, 
-                font_color=current_font_color, 
-                qr_code_file_path=current_qr_path
+        # Tk variables and widgets are read here, on the Tk thread; the worker only sees this snapshot
+        settings = {
+            "overlay": self._preview_overlay,
+            "scale": self.preview_scale,
+            "unicode_text": self.text_input_widget.get("1.0", tk.END).strip(),
+            "font_path": self.selected_font_path,
+            "font_size": self.font_size_var.get(),
+            "text_y_offset": self.text_y_offset_var.get(),
+            "font_color": self.font_color_var.get(),
+            "qr_path": self.qr_code_path_var.get(),
+            "auto_fit": self.auto_fit_var.get(),
+            "image_size": self.base_image_size,
+        }
+        self._preview_generation += 1
+        self._preview_executor.submit(self._render_preview, self._preview_generation, settings)
+        self._start_preview_polling()
+
+    def _render_preview(self, generation, settings):
+        # Runs on the preview worker thread
+        if generation != self._preview_generation:
+            return # Superseded while queued
+        preview_image = None
+        try:
+            legacy_text_to_draw = ""
+            if settings["unicode_text"]:
+                try:
+                    legacy_text_to_draw = convert_unicode_to_legacy(settings["unicode_text"])
+                except Exception as e:
+                    print(f"❌ Error converting Sinhala text: {e}. Please check your input or API connection.")
+                    # Display image without text if conversion fails
+
+            if settings["font_size"] <= 0 and legacy_text_to_draw: # Only an issue if there's text
+                print("⚠️ Font size is not positive. Cannot render text.")
+                legacy_text_to_draw = "" # Still generate image with QR if selected
+
+            font_size = settings["font_size"]
+            text_align = "left"
+            if settings["auto_fit"] and legacy_text_to_draw:
+                # Fitted at full resolution so the line breaks match the downloaded image
+                font_size, legacy_text_to_draw = fit_text_to_image(legacy_text_to_draw, settings["font_path"], settings["image_size"],
+                                                                   settings["text_y_offset"], font_size)
+                text_align = TEXT_ALIGN_CENTER
+
+            scale = settings["scale"]
+            # Only the layers whose settings changed since the last preview are rebuilt
+            preview_image = settings["overlay"].render(
+                legacy_text_to_draw,
+                settings["font_path"],
+                max(1, round(font_size * scale)) if legacy_text_to_draw else 1, # Use 1 if no text to avoid error with font size 0
+                text_y_offset_percent=settings["text_y_offset"],
+                font_color=settings["font_color"],
+                qr_code_file_path=settings["qr_path"],
+                qr_margin=round(QR_CODE_MARGIN * scale),
+                text_align=text_align
             )
-        
-        display_image = processed_pil_image.copy()
-        display_image.thumbnail((self.MAX_PREVIEW_WIDTH, self.MAX_PREVIEW_HEIGHT), Image.Resampling.LANCZOS)
+        except Exception as e:
+            print(f"⚠️ Error rendering preview: {e}")
+        if generation == self._preview_generation:
+            self._preview_results.put((generation, preview_image))
+
+    def _start_preview_polling(self):
+        if self._preview_poll_after_id is None:
+            self._preview_poll_after_id = self.master.after(PREVIEW_POLL_MS, self._poll_preview_results)
+
+    def _poll_preview_results(self):
+        self._preview_poll_after_id = None
+        latest = None
+        while True:
+            try:
+                latest = self._preview_results.get_nowait()
+            except queue.Empty:
+                break
+        if latest is not None and latest[0] == self._preview_generation:
+            if latest[1] is not None:
+                self.current_tk_image = ImageTk.PhotoImage(latest[1])
+                self.image_label.config(image=self.current_tk_image)
+            return
+        self._start_preview_polling() # The newest render has not finished yet
 
-        self.current_tk_image = ImageTk.PhotoImage(display_image)
-        self.image_label.config(image=self.current_tk_image)
+    def _on_close(self):
+        self._preview_executor.shutdown(wait=False, cancel_futures=True)
+        self.font_gallery.close()
+        self._save_executor.shutdown(wait=True) # Let a download that is still encoding finish writing
+        self.master.destroy()
 
     def download_image(self):
         selected_font_filename = self.font_combobox.get()
         self.selected_font_path = next((f for f in self.available_fonts if os.path.basename(f) == selected_font_filename), None)
 
-        if not self.base_pil_image or not self.selected_font_path:
+        if not self.base_image_path or not self.selected_font_path:
             print("⚠️ Cannot download: Base image or font path not ready.")
             return
 
@@ -255,25 +492,44 @@ class LiveViewApp:
         current_text_y_offset = self.text_y_offset_var.get()
         current_font_color = self.font_color_var.get() 
         current_qr_path = self.qr_code_path_var.get()
+        current_text_align = "left"
+        if self.auto_fit_var.get() and final_legacy_text:
+            try:
+                current_font_size, final_legacy_text = fit_text_to_image(final_legacy_text, self.selected_font_path, self.base_image_size,
+                                                                         current_text_y_offset, current_font_size)
+                current_text_align = TEXT_ALIGN_CENTER
+            except IOError as e:
+                print(f"⚠️ Could not auto-fit text: {e}. Using the slider size.")
+
+        try:
+            full_base_image = load_image(self.base_image_path) # First full-resolution decode happens here
+        except Exception as e:
+            print(f"❌ Error loading image '{self.base_image_path}': {e}")
+            return
 
         image_to_download = generate_overlayed_image(
-            self.base_pil_image,
+            full_base_image,
             final_legacy_text,
             self.selected_font_path, 
             current_font_size if final_legacy_text else 1, # Use 1 if no text
             font_color=current_font_color, 
             text_y_offset_percent=current_text_y_offset, 
-            qr_code_file_path=current_qr_path 
+            qr_code_file_path=current_qr_path,
+            text_align=current_text_align
         )
 
         file_path = filedialog.asksaveasfilename(
             defaultextension=".png",
-            filetypes=[("PNG files", "*.png"), ("JPEG files", "*.jpg"), ("All files", "*.*")],
+            filetypes=[("PNG files", "*.png"), ("JPEG files", "*.jpg"), ("WebP files", "*.webp"), ("All files", "*.*")],
             title="Save Image As"
         )
         if file_path: 
-            try:
-                image_to_download.save(file_path)
-                print(f"✅ Image saved to {file_path}")
-            except Exception as e:
-                print(f"❌ Error saving image: {e}")
+            self._save_executor.submit(self._save_download, image_to_download, file_path)
+
+    def _save_download(self, image, file_path):
+        # Runs on the save thread; the format follows the chosen extension and JPEG is flattened automatically
+        try:
+            save_image(image, file_path)
+            print(f"✅ Image saved to {file_path}")
+        except Exception as e:
+            print(f"❌ Error saving image: {e}")
@@ -1,84 +1,473 @@
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageChops, ImageDraw, ExifTags
+from collections import OrderedDict
+import functools
+import math
 import os
+import threading
+
+from font_registry import get_font, get_text_bbox
+from text_layout import fit_text_to_image, TEXT_ALIGN_CENTER
+from render_timing import stage_timer, STAGE_FILL, STAGE_OUTLINE, STAGE_QR_LOAD, STAGE_COMPOSITE
 
 # --- Constants for QR Code ---
 QR_CODE_TARGET_HEIGHT_RATIO = 0.24  # e.g., 24% of main image height
 QR_CODE_MARGIN = 20  # pixels from edge
+QR_CODE_CACHE_SIZE = 16  # decoded and resized QR images kept
+
+# --- Constants for Text Outline ---
+OUTLINE_STROKE_SQUARE = "square"  # same footprint as the old per-offset draw.text loop
+OUTLINE_STROKE_ROUND = "round"
+DEFAULT_OUTLINE_COLOR = "black"
+
+# --- Constants for Image Loading ---
+DEFAULT_IMAGE_CACHE_BYTES = 256 * 1024 * 1024 # Decoded pixels kept across renders
+LOAD_REDUCING_GAP = 2 # Integer reduction stops at 2x the target so the final LANCZOS resize has real pixels to filter
+EXIF_ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+EXIF_SWAPPED_ORIENTATIONS = (5, 6, 7, 8) # Orientations that turn the stored image by 90 degrees
+
+def _fit_size(size, max_size):
+    """Largest size with the same aspect ratio that fits in max_size, never larger than `size`."""
+    scale = min(1.0, max_size[0] / size[0], max_size[1] / size[1])
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+def _get_exif_orientation(opened_image):
+    try:
+        return opened_image.getexif().get(ExifTags.Base.Orientation, 1)
+    except Exception: # Broken EXIF blocks should not stop the image from loading
+        return 1
+
+def get_image_size(image_path):
+    """(width, height) as displayed, i.e. after EXIF orientation, read from the header without decoding pixels."""
+    with Image.open(image_path) as opened:
+        width, height = opened.size
+        if _get_exif_orientation(opened) in EXIF_SWAPPED_ORIENTATIONS:
+            return height, width
+        return width, height
+
+def _decode_image(image_path, max_size=None):
+    with Image.open(image_path) as opened:
+        orientation = _get_exif_orientation(opened)
+        if max_size:
+            if orientation in EXIF_SWAPPED_ORIENTATIONS:
+                max_size = (max_size[1], max_size[0]) # Fit the stored (unrotated) pixels
+            target_size = _fit_size(opened.size, max_size)
+            # JPEG only: the decoder scales by 1/2, 1/4 or 1/8 itself, never below target_size
+            opened.draft(opened.mode, target_size)
+            image = opened
+            if image.mode not in ("RGB", "RGBA", "L"):
+                image = image.convert("RGBA") # reduce() and LANCZOS need a plain mode (palette, 1-bit, CMYK, ...)
+            factor = min(image.width // target_size[0], image.height // target_size[1]) // LOAD_REDUCING_GAP
+            if factor > 1:
+                image = image.reduce(factor) # Box-filtered integer downscale; cheap compared to LANCZOS on the full frame
+            if image.size != target_size:
+                image = image.resize(target_size, Image.Resampling.LANCZOS)
+            elif image is opened:
+                image = opened.copy()
+        else:
+            opened.load()
+            image = opened.copy()
+    transpose_method = EXIF_ORIENTATION_TRANSPOSE.get(orientation)
+    return image.transpose(transpose_method) if transpose_method is not None else image
+
+class DecodedImageCache:
+    """
+    LRU of decoded images keyed by (path, mtime, max_size), evicted once the decoded pixels exceed max_bytes.
+    An edited file gets a new mtime, so stale entries are never returned.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_IMAGE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._images = OrderedDict() # key -> (image, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, image_path, max_size=None):
+        key = (os.path.abspath(image_path), os.path.getmtime(image_path), tuple(max_size) if max_size else None)
+        with self._lock:
+            cached = self._images.get(key)
+            if cached is not None:
+                self._images.move_to_end(key)
+                self._stats["hits"] += 1
+                return cached[0]
+        image = _decode_image(image_path, max_size) # Decoded outside the lock so other loads are not held up
+        image_bytes = image.width * image.height * len(image.getbands())
+        with self._lock:
+            self._stats["misses"] += 1
+            if key not in self._images:
+                self._images[key] = (image, image_bytes)
+                self._bytes += image_bytes
+            # Always keep the image just loaded, even if it alone is over the cap
+            while self._bytes > self.max_bytes and len(self._images) > 1:
+                _, (_, evicted_bytes) = self._images.popitem(last=False)
+                self._bytes -= evicted_bytes
+                self._stats["evictions"] += 1
+            return self._images[key][0]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["images"] = len(self._images)
+            stats["bytes"] = self._bytes
+            return stats
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._bytes = 0
+
+_image_cache = DecodedImageCache()
+
+def configure_image_cache(max_bytes=DEFAULT_IMAGE_CACHE_BYTES):
+    """Replaces the shared decoded-image cache with one using the given limit."""
+    global _image_cache
+    _image_cache = DecodedImageCache(max_bytes)
+    return _image_cache
+
+def load_image(image_path, max_size=None):
+    """
+    Returns the image at image_path with its EXIF orientation applied. With max_size=(w, h) it is scaled to fit,
+    decoding JPEGs directly at reduced size (draft) and shrinking other formats with reduce() before the final
+    resize, so a preview never needs the full-resolution decode. Results are cached and shared; do not modify them.
+    """
+    return _image_cache.get(image_path, max_size)
+
+def get_outline_strength(font_size_px):
+    """Outline radius in pixels for a given font size."""
+    return max(1, int(font_size_px / 25))
+
+def _shift_mask(mask, dx, dy):
+    """Returns a copy of an L-mode mask moved by (dx, dy); pixels shifted out are dropped."""
+    shifted = Image.new("L", mask.size, 0)
+    shifted.paste(mask, (dx, dy))
+    return shifted
+
+def _dilate_mask_segment(mask, radius, horizontal=True):
+    """
+    Max-filters the mask along one axis with a window of 2*radius+1 pixels.
+    The covered half-width roughly triples on every step, so this costs
+    O(log radius) image operations instead of one per offset.
+    """
+    covered = 0
+    while covered < radius:
+        step = min(2 * covered + 1, radius - covered)
+        if horizontal:
+            forward, backward = _shift_mask(mask, step, 0), _shift_mask(mask, -step, 0)
+        else:
+            forward, backward = _shift_mask(mask, 0, step), _shift_mask(mask, 0, -step)
+        mask = ImageChops.lighter(mask, ImageChops.lighter(forward, backward))
+        covered += step
+    return mask
+
+def dilate_mask(mask, radius, stroke=OUTLINE_STROKE_SQUARE):
+    """
+    Grows an L-mode coverage mask by `radius` pixels.
+    A square stroke is a separable max filter; a round stroke is the union of
+    horizontal segments whose half-width follows the disk profile.
+    """
+    if radius <= 0:
+        return mask.copy()
+    if stroke == OUTLINE_STROKE_SQUARE:
+        return _dilate_mask_segment(_dilate_mask_segment(mask, radius, horizontal=True), radius, horizontal=False)
+    if stroke != OUTLINE_STROKE_ROUND:
+        raise ValueError(f"Unknown outline stroke '{stroke}'. Use '{OUTLINE_STROKE_SQUARE}' or '{OUTLINE_STROKE_ROUND}'.")
+
+    # Horizontal dilations for every half-width 0..radius, each built from the previous one
+    segments = [mask]
+    for _ in range(radius):
+        previous = segments[-1]
+        segments.append(ImageChops.lighter(previous, ImageChops.lighter(_shift_mask(previous, 1, 0), _shift_mask(previous, -1, 0))))
+
+    dilated = segments[radius]
+    for dy in range(1, radius + 1):
+        half_width = int(math.sqrt(radius * radius - dy * dy))
+        segment = segments[half_width]
+        dilated = ImageChops.lighter(dilated, ImageChops.lighter(_shift_mask(segment, 0, dy), _shift_mask(segment, 0, -dy)))
+    return dilated
+
+def render_text_masks(text_to_draw, font, origin, outline_strength, outline_stroke=OUTLINE_STROKE_SQUARE, text_bbox=None, text_align="left"):
+    """
+    Rasterizes the text once into a tight L-mode glyph mask and derives the outline mask from it.
+    `origin` is the (x, y) draw.text position in the target image; `text_bbox` is the textbbox at (0, 0)
+    if the caller already has it. `text_align` ("left", "center" or "right") lines up multi-line text.
+    Returns (glyph_mask, outline_mask, (left, top)) where (left, top) is where the masks go in the target,
+    or None when there is nothing to draw.
+    """
+    if not text_to_draw:
+        return None
+    x, y = origin
+    if text_bbox is None:
+        text_bbox = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), text_to_draw, font=font, align=text_align)
+    text_bbox = (text_bbox[0] + x, text_bbox[1] + y, text_bbox[2] + x, text_bbox[3] + y)
+    if text_bbox[2] <= text_bbox[0] or text_bbox[3] <= text_bbox[1]:
+        return None
+
+    padding = outline_strength + 1  # +1 absorbs sub-pixel rounding of the glyph origin
+    left = math.floor(text_bbox[0]) - padding
+    top = math.floor(text_bbox[1]) - padding
+    right = math.ceil(text_bbox[2]) + padding
+    bottom = math.ceil(text_bbox[3]) + padding
 
-def add_qr_code_to_image(image, main_image_height, qr_code_file_path=None):
-    """Loads, resizes, and pastes the QR code onto the main image."""
+    with stage_timer(STAGE_FILL):
+        glyph_mask = Image.new("L", (right - left, bottom - top), 0)
+        ImageDraw.Draw(glyph_mask).text((x - left, y - top), text_to_draw, font=font, fill=255, align=text_align)
+    with stage_timer(STAGE_OUTLINE):
+        outline_mask = dilate_mask(glyph_mask, outline_strength, outline_stroke)
+    return glyph_mask, outline_mask, (left, top)
+
+def colorize_text_masks(glyph_mask, outline_mask, font_color="white", outline_color=DEFAULT_OUTLINE_COLOR):
+    """Builds the RGBA text sprite: fill where the glyphs are, outline color around them."""
+    with stage_timer(STAGE_FILL):
+        outline_layer = Image.new("RGBA", outline_mask.size, outline_color)
+        outline_layer.putalpha(outline_mask)
+        fill_layer = Image.new("RGBA", glyph_mask.size, font_color)
+        fill_layer.putalpha(glyph_mask)
+        return Image.alpha_composite(outline_layer, fill_layer)
+
+def composite_sprite(image, sprite, position):
+    """
+    Alpha-composites an RGBA sprite onto an RGBA or RGB `image` in place at `position`, clipping at the
+    image edges. Only the sprite's rectangle of the image is read or written.
+    """
+    left, top = position
+    src_left, src_top = max(0, -left), max(0, -top)
+    src_right = min(sprite.width, image.width - left)
+    src_bottom = min(sprite.height, image.height - top)
+    if src_right <= src_left or src_bottom <= src_top:
+        return
+    with stage_timer(STAGE_COMPOSITE):
+        if image.mode == "RGBA":
+            image.alpha_composite(sprite, dest=(left + src_left, top + src_top),
+                                  source=(src_left, src_top, src_right, src_bottom))
+        elif image.mode == "RGB":
+            # Over opaque pixels, blending by the sprite's alpha is the same as compositing
+            image.paste(sprite, position, sprite)
+        else:
+            raise ValueError(f"Cannot composite onto a '{image.mode}' image; use RGB or RGBA.")
+
+@functools.lru_cache(maxsize=QR_CODE_CACHE_SIZE)
+def _load_qr_code(qr_code_file_path, modified_time):
+    # modified_time is part of the cache key so an edited QR file is picked up
+    with stage_timer(STAGE_QR_LOAD), Image.open(qr_code_file_path) as qr_image:
+        return qr_image.convert("RGBA") # Ensure RGBA for transparency
+
+@functools.lru_cache(maxsize=QR_CODE_CACHE_SIZE)
+def _resize_qr_code(qr_code_file_path, modified_time, target_size):
+    qr_image = _load_qr_code(qr_code_file_path, modified_time)
+    with stage_timer(STAGE_QR_LOAD):
+        return qr_image.resize(target_size)
+
+def get_qr_code_sprite(qr_code_file_path, main_image_height):
+    """
+    Returns the QR code as an RGBA image sized for a main image of this height, or None if it cannot be used.
+    Decoded and resized QR codes are cached, so repeated renders do not reopen the file.
+    The returned image is shared; do not modify it.
+    """
     if not qr_code_file_path or not os.path.exists(qr_code_file_path):
         if qr_code_file_path: # Only print if a path was given but not found
             print(f"⚠️ QR code file '{qr_code_file_path}' not found. Skipping QR overlay.")
         else:
             # This case is normal if user doesn't select a QR code
             pass # print("ℹ️ No QR code selected. Skipping QR overlay.")
-        return
+        return None
 
-    img_width, img_height = image.size # main image dimensions
     try:
-        qr_image_original = Image.open(qr_code_file_path).convert("RGBA") # Ensure RGBA for transparency
-        qr_original_width, qr_original_height = qr_image_original.size
+        modified_time = os.path.getmtime(qr_code_file_path)
+        qr_original_width, qr_original_height = _load_qr_code(qr_code_file_path, modified_time).size
 
         if qr_original_height == 0:
             print(f"⚠️ QR code image '{os.path.basename(qr_code_file_path)}' has zero height. Skipping QR overlay.")
-            return
+            return None
 
         qr_target_h = int(main_image_height * QR_CODE_TARGET_HEIGHT_RATIO)
         if qr_target_h <= 0:
             print(f"⚠️ Main image height or QR ratio too small for QR code. Skipping QR overlay.")
-            return
+            return None
 
         qr_aspect_ratio = qr_original_width / qr_original_height
         qr_target_w = int(qr_target_h * qr_aspect_ratio)
 
         if qr_target_w <= 0:
             print(f"⚠️ Calculated QR code target width is not positive ({qr_target_w}). Skipping QR overlay.")
-            return
-
-        qr_image_resized = qr_image_original.resize((qr_target_w, qr_target_h))
-
-        qr_pos_x = QR_CODE_MARGIN
-        qr_pos_y = img_height - qr_image_resized.height - QR_CODE_MARGIN
+            return None
 
-        # Ensure QR is within bounds if image is very small or margins large
-        if qr_pos_x < 0: qr_pos_x = 0
-        if qr_pos_y < 0: qr_pos_y = 0
-        
-        image.paste(qr_image_resized, (qr_pos_x, qr_pos_y), qr_image_resized)
-        print(f"ℹ️ QR code '{os.path.basename(qr_code_file_path)}' added to image.")
+        return _resize_qr_code(qr_code_file_path, modified_time, (qr_target_w, qr_target_h))
 
     except Exception as e:
         print(f"⚠️ An error occurred while processing QR code '{os.path.basename(qr_code_file_path)}': {e}. Skipping QR overlay.")
+        return None
 
-def generate_overlayed_image(base_pil_image, text_to_draw, ttf_path, font_size_px, text_y_offset_percent=50.0, font_color="white", qr_code_file_path=None):
+def get_qr_code_position(image_size, qr_sprite_size, qr_margin=QR_CODE_MARGIN):
+    """Top-left corner for the QR code, `qr_margin` pixels from the bottom-left corner of the image."""
+    qr_pos_x = qr_margin
+    qr_pos_y = image_size[1] - qr_sprite_size[1] - qr_margin
+
+    # Ensure QR is within bounds if image is very small or margins large
+    if qr_pos_x < 0: qr_pos_x = 0
+    if qr_pos_y < 0: qr_pos_y = 0
+    return qr_pos_x, qr_pos_y
+
+def add_qr_code_to_image(image, main_image_height, qr_code_file_path=None, qr_margin=QR_CODE_MARGIN):
     """
-    Draws text and optionally a QR code on a copy of the base_pil_image.
-    Returns a new PIL Image object.
+    Composites the (cached, resized) QR code onto the main image, `qr_margin` pixels from the bottom-left corner.
+    Uses composite_sprite like LayeredOverlay, so both paths give the same pixels, alpha included.
     """
-    image_with_overlay = base_pil_image.copy().convert("RGBA") # Work on a copy
-    draw = ImageDraw.Draw(image_with_overlay)
+    qr_image_resized = get_qr_code_sprite(qr_code_file_path, main_image_height)
+    if qr_image_resized is None:
+        return
+    composite_sprite(image, qr_image_resized, get_qr_code_position(image.size, qr_image_resized.size, qr_margin))
+    print(f"ℹ️ QR code '{os.path.basename(qr_code_file_path)}' added to image.")
+
+def generate_overlayed_image(base_pil_image, text_to_draw, ttf_path, font_size_px, text_y_offset_percent=50.0, font_color="white", qr_code_file_path=None, outline_stroke=OUTLINE_STROKE_SQUARE, font=None, qr_margin=QR_CODE_MARGIN, in_place=False, text_align="left", outline_color=DEFAULT_OUTLINE_COLOR):
+    """
+    Draws text with an `outline_color` outline and optionally a QR code on a copy of the base_pil_image.
+    The text is rasterized once; its outline is grown from that mask and both are composited in one step.
+    Only the text and QR rectangles are composited; the rest of the frame is just the one RGBA conversion.
+    Fonts and text layout come from the shared font registry; pass an already loaded `font`
+    (matching ttf_path/font_size_px) to use it instead.
+    Returns a new RGBA PIL Image object, or with in_place=True draws straight onto base_pil_image (which
+    must be RGB or RGBA and owned by the caller) and returns it, skipping the full-frame copy.
+    """
+    if in_place:
+        if base_pil_image.mode not in ("RGB", "RGBA"):
+            raise ValueError(f"In-place rendering needs an RGB or RGBA image, not '{base_pil_image.mode}'.")
+        image_with_overlay = base_pil_image
+    else:
+        with stage_timer(STAGE_COMPOSITE):
+            image_with_overlay = base_pil_image.convert("RGBA") # Always a new image, so this is the copy
     width, height = image_with_overlay.size
 
     try:
-        font = ImageFont.truetype(ttf_path, font_size_px)
+        if font is None:
+            font = get_font(ttf_path, font_size_px)
+        text_bbox = get_text_bbox(ttf_path, font_size_px, text_to_draw, text_align)
     except IOError:
         print(f"❌ Error: Font file '{ttf_path}' not found or cannot be read for size {font_size_px}.")
-        add_qr_code_to_image(image_with_overlay, height, qr_code_file_path) # Still attempt to add QR
+        add_qr_code_to_image(image_with_overlay, height, qr_code_file_path, qr_margin) # Still attempt to add QR
         return image_with_overlay
 
-    text_bbox = draw.textbbox((0, 0), text_to_draw, font=font)
     text_actual_width = text_bbox[2] - text_bbox[0]
     text_actual_height = text_bbox[3] - text_bbox[1]
     x = (width - text_actual_width) / 2 - text_bbox[0]
     y_top_target = height * (text_y_offset_percent / 100.0)
     y = y_top_target - text_bbox[1]
-    outline_strength = max(1, int(font_size_px / 25))
-    for dx_outline in range(-outline_strength, outline_strength + 1):
-        for dy_outline in range(-outline_strength, outline_strength + 1):
-            if dx_outline == 0 and dy_outline == 0:
-                continue
-            draw.text((x + dx_outline, y + dy_outline), text_to_draw, font=font, fill="black")
-    draw.text((x, y), text_to_draw, font=font, fill=font_color)
-    add_qr_code_to_image(image_with_overlay, height, qr_code_file_path)
-    return image_with_overlay
\ No newline at end of file
+    outline_strength = get_outline_strength(font_size_px)
+    text_masks = render_text_masks(text_to_draw, font, (x, y), outline_strength, outline_stroke, text_bbox=text_bbox, text_align=text_align)
+    if text_masks:
+        glyph_mask, outline_mask, position = text_masks
+        composite_sprite(image_with_overlay, colorize_text_masks(glyph_mask, outline_mask, font_color, outline_color), position)
+    add_qr_code_to_image(image_with_overlay, height, qr_code_file_path, qr_margin)
+    return image_with_overlay
+
+class LayeredOverlay:
+    """
+    Renders overlays for one base image from cached RGBA layers: the base, a tight text/outline sprite and a
+    QR sprite. Each layer is rebuilt only when a parameter it depends on changes: moving the text re-places
+    the cached sprite, changing its color re-tints the cached masks, and the QR sprite only depends on the
+    QR file and the base size. The text top is snapped to whole pixels so moving it never re-rasterizes.
+    """
+
+    def __init__(self, base_pil_image, share_base=False):
+        """
+        Keeps its own RGBA copy of the base unless share_base=True and the base is already RGBA, in which case
+        the caller's image is used directly, e.g. one read-only base shared by overlays on several threads.
+        The base is only ever read either way.
+        """
+        if share_base and base_pil_image.mode == "RGBA":
+            self.base_image = base_pil_image
+        else:
+            self.base_image = base_pil_image.convert("RGBA") # Own RGBA copy; the caller's image is not touched
+        self._text_masks_key = None
+        self._text_masks = None # (glyph_mask, outline_mask, (left, top relative to the text top)) or None
+        self._text_sprite_key = None
+        self._text_sprite = None
+
+    def _get_text_masks(self, text_to_draw, ttf_path, font_size_px, outline_stroke, text_align):
+        key = (text_to_draw, ttf_path, font_size_px, outline_stroke, text_align)
+        if key != self._text_masks_key:
+            font = get_font(ttf_path, font_size_px)
+            text_bbox = get_text_bbox(ttf_path, font_size_px, text_to_draw, text_align)
+            x = (self.base_image.width - (text_bbox[2] - text_bbox[0])) / 2 - text_bbox[0]
+            self._text_masks = render_text_masks(text_to_draw, font, (x, -text_bbox[1]),
+                                                 get_outline_strength(font_size_px), outline_stroke, text_bbox=text_bbox, text_align=text_align)
+            self._text_masks_key = key
+            self._text_sprite_key = None
+        return self._text_masks
+
+    def _get_text_layer(self, text_to_draw, ttf_path, font_size_px, text_y_offset_percent, font_color, outline_stroke, text_align, outline_color):
+        text_masks = self._get_text_masks(text_to_draw, ttf_path, font_size_px, outline_stroke, text_align)
+        if not text_masks:
+            return None
+        glyph_mask, outline_mask, (left, top) = text_masks
+        sprite_key = (self._text_masks_key, font_color, outline_color)
+        if sprite_key != self._text_sprite_key:
+            self._text_sprite = colorize_text_masks(glyph_mask, outline_mask, font_color, outline_color)
+            self._text_sprite_key = sprite_key
+        text_top = round(self.base_image.height * (text_y_offset_percent / 100.0))
+        return self._text_sprite, (left, top + text_top)
+
+    def _get_qr_layer(self, qr_code_file_path, qr_margin):
+        qr_sprite = get_qr_code_sprite(qr_code_file_path, self.base_image.height)
+        if qr_sprite is None:
+            return None
+        return qr_sprite, get_qr_code_position(self.base_image.size, qr_sprite.size, qr_margin)
+
+    def render(self, text_to_draw, ttf_path, font_size_px, text_y_offset_percent=50.0, font_color="white", qr_code_file_path=None, outline_stroke=OUTLINE_STROKE_SQUARE, qr_margin=QR_CODE_MARGIN, text_align="left", outline_color=DEFAULT_OUTLINE_COLOR):
+        """
+        Same parameters as generate_overlayed_image, built from the cached layers. The result matches it except
+        that the text top is rounded to a whole pixel: when the offset does not land on one, the text sits up to
+        half a pixel higher or lower, which changes the antialiased edge pixels.
+        """
+        layers = []
+        if text_to_draw:
+            try:
+                layers.append(self._get_text_layer(text_to_draw, ttf_path, font_size_px, text_y_offset_percent, font_color, outline_stroke, text_align, outline_color))
+            except IOError:
+                print(f"❌ Error: Font file '{ttf_path}' not found or cannot be read for size {font_size_px}.")
+        layers.append(self._get_qr_layer(qr_code_file_path, qr_margin))
+
+        with stage_timer(STAGE_COMPOSITE):
+            image_with_overlay = self.base_image.copy()
+        for layer in layers:
+            if layer:
+                composite_sprite(image_with_overlay, *layer)
+        return image_with_overlay
+
+def render_many(base_pil_image, texts, ttf_path, font_size_px, text_y_offset_percent=50.0, font_color="white", qr_code_file_path=None, outline_stroke=OUTLINE_STROKE_SQUARE, qr_margin=QR_CODE_MARGIN, auto_fit=False, outline_color=DEFAULT_OUTLINE_COLOR):
+    """
+    Template mode: renders one base image with many captions, yielding one new image per caption in order.
+    The base conversion, font load and QR sprite happen once up front; each caption then only costs its
+    text sprite and a copy of the prepared base, and images are produced lazily so memory stays flat.
+    Layers stack as in generate_overlayed_image, with the QR code over the text.
+    With auto_fit=True each caption is wrapped, centered and sized to fit below its offset, with
+    font_size_px as the largest size allowed.
+    A caption that fails to render is yielded as its exception instead of an image, and so is an exception
+    passed in `texts` (e.g. a failed conversion), so one bad caption does not end the run.
+    Raises IOError up front if the font cannot be loaded.
+    """
+    get_font(ttf_path, font_size_px)
+    overlay = LayeredOverlay(base_pil_image)
+    for text_to_draw in texts:
+        if isinstance(text_to_draw, Exception):
+            yield text_to_draw
+            continue
+        try:
+            caption_size_px, text_align = font_size_px, "left"
+            if auto_fit:
+                caption_size_px, text_to_draw = fit_text_to_image(text_to_draw, ttf_path, overlay.base_image.size, text_y_offset_percent, font_size_px)
+                text_align = TEXT_ALIGN_CENTER
+            image = overlay.render(text_to_draw, ttf_path, caption_size_px, text_y_offset_percent=text_y_offset_percent,
+                                   font_color=font_color, qr_code_file_path=qr_code_file_path, outline_stroke=outline_stroke,
+                                   qr_margin=qr_margin, text_align=text_align, outline_color=outline_color)
+        except Exception as e:
+            yield e
+        else:
+            yield image
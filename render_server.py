@@ -0,0 +1,413 @@
+import base64
+import binascii
+import io
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+from PIL import Image, ImageColor, ImageOps
+
+from image_utils import LayeredOverlay, load_image, DEFAULT_OUTLINE_COLOR
+from font_registry import get_font
+from font_utils import resource_path, find_ttf_fonts, convert_unicode_to_legacy, FONTS_FOLDER
+from output_utils import encode_image, FORMAT_EXTENSIONS, DEFAULT_QUALITY, BULK_PNG_COMPRESS_LEVEL
+from render_timing import collect_stage_timings
+
+# --- Server defaults ---
+DEFAULT_HOST = "127.0.0.1" # Local only unless asked otherwise
+DEFAULT_PORT = 8000
+DEFAULT_MAX_QUEUE = 32 # Requests allowed to wait for a worker before new ones get 503
+DEFAULT_SERVER_IMAGES = ["jokes_bg.png", "jk1.png", "qr_code.png"] # Bundled images preloaded by name
+MAX_REQUEST_BYTES = 32 * 1024 * 1024
+RENDER_TIMEOUT_S = 30
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+MAX_QUALITY = 100 # JPEG/WebP quality range is 0..MAX_QUALITY
+MAX_COMPRESS_LEVEL = 9 # PNG (zlib) compress levels are 0..MAX_COMPRESS_LEVEL
+
+CONTENT_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+class RequestError(Exception):
+    """A bad /render request; carries the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def _get_string_param(params, name, default=None):
+    """params[name] if it is a string (default when missing or null); raises RequestError for any other JSON value."""
+    value = params.get(name)
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise RequestError(f"'{name}' must be a string.")
+    return value
+
+def _check_font_size(font_size_px, image_height):
+    # Text taller than the base cannot fit, and a huge size would rasterize and dilate a huge mask
+    if not 0 < font_size_px <= image_height:
+        raise RequestError(f"'size' must be between 1 and the base image height ({image_height}), not {font_size_px}.")
+
+class LatencyHistogram:
+    """Cumulative-bucket latency histogram in milliseconds. Not locked; RenderMetrics guards it."""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = list(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1) # Last slot is +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, value_ms):
+        for i, bound in enumerate(self.buckets_ms):
+            if value_ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+
+    def snapshot(self):
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets_ms + ["+Inf"], self.counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        return {"count": self.count, "sum_ms": round(self.sum_ms, 3), "buckets": buckets}
+
+class RenderMetrics:
+    """Request counters, queue depth and per-stage latency histograms for /metrics."""
+
+    STAGES = ("total", "queue_wait", "render", "encode")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queued = 0 # Accepted, waiting for a worker
+        self.running = 0
+        self.responses = {} # HTTP status -> count
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+
+    def try_admit(self, max_in_flight):
+        """Counts a new queued render unless max_in_flight are already queued or running."""
+        with self._lock:
+            if self.queued + self.running >= max_in_flight:
+                return False
+            self.queued += 1
+            return True
+
+    def cancel_queued(self):
+        with self._lock:
+            self.queued -= 1
+
+    def start_running(self):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+
+    def finish_running(self):
+        with self._lock:
+            self.running -= 1
+
+    def observe(self, stage, value_ms):
+        with self._lock:
+            self.histograms[stage].observe(value_ms)
+
+    def count_response(self, status):
+        with self._lock:
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "queue_depth": self.queued,
+                "running": self.running,
+                "responses": {str(status): count for status, count in sorted(self.responses.items())},
+                "latency_ms": {stage: histogram.snapshot() for stage, histogram in self.histograms.items()},
+            }
+
+class RenderService:
+    """
+    Keeps fonts, base images and QR sprites warm and renders on a bounded thread pool. At most
+    `workers + max_queue` renders are admitted at once; further requests are rejected immediately
+    (503) instead of piling up behind a slow queue. `conversion_backend` is passed to convert_unicode_to_legacy
+    for 'unicode_text' ("auto" or "local" keeps the service off the network); None uses the app default.
+    """
+
+    def __init__(self, image_paths=None, fonts_folder=None, workers=None, max_queue=DEFAULT_MAX_QUEUE, conversion_backend=None):
+        self.conversion_backend = conversion_backend
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_in_flight = self.workers + max_queue
+        self.metrics = RenderMetrics()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="render")
+        self._worker_state = threading.local() # Per-thread LayeredOverlays; their sprite caches are not thread-safe
+
+        fonts_folder = fonts_folder or resource_path(FONTS_FOLDER)
+        self.fonts = {os.path.basename(path): path for path in find_ttf_fonts(fonts_folder)}
+
+        self.image_paths = {}
+        self.base_images = {} # name -> decoded RGBA image shared read-only by the workers
+        for path in image_paths if image_paths is not None else [resource_path(p) for p in DEFAULT_SERVER_IMAGES]:
+            self.add_image(path)
+
+    def add_image(self, image_path):
+        """
+        Decodes an image once and makes it available by file name as a base image or QR code.
+        QR sprites are cached per (file, base height) by image_utils after their first use.
+        """
+        name = os.path.basename(image_path)
+        self.base_images[name] = load_image(image_path).convert("RGBA")
+        self.image_paths[name] = image_path
+
+    def _get_overlay(self, name):
+        overlays = getattr(self._worker_state, "overlays", None)
+        if overlays is None:
+            overlays = self._worker_state.overlays = {}
+        overlay = overlays.get(name)
+        if overlay is None:
+            # Shares the preloaded base, so each thread only adds its text and QR sprite caches
+            overlay = overlays[name] = LayeredOverlay(self.base_images[name], share_base=True)
+        return overlay
+
+    def parse_request(self, params, uploaded_image_bytes=None):
+        """Validates /render parameters into keyword arguments for render(). Raises RequestError."""
+        font_name = _get_string_param(params, "font")
+        if not font_name:
+            raise RequestError("'font' is required.")
+        if font_name not in self.fonts:
+            raise RequestError(f"Unknown font '{font_name}'.", 404)
+
+        base_image_data = _get_string_param(params, "base_image_data")
+        if uploaded_image_bytes is None and base_image_data:
+            try:
+                uploaded_image_bytes = base64.b64decode(base_image_data, validate=True)
+            except (binascii.Error, ValueError):
+                raise RequestError("'base_image_data' is not valid base64.")
+        base_image_name = _get_string_param(params, "base_image")
+        if uploaded_image_bytes is None:
+            if not base_image_name:
+                raise RequestError("Give 'base_image' (a preloaded name) or upload the image.")
+            if base_image_name not in self.base_images:
+                raise RequestError(f"Unknown base image '{base_image_name}'.", 404)
+
+        qr_name = _get_string_param(params, "qr")
+        if qr_name and qr_name not in self.image_paths:
+            raise RequestError(f"Unknown QR image '{qr_name}'.", 404)
+
+        output_format = str(params.get("format", "PNG")).upper()
+        if output_format == "JPG":
+            output_format = "JPEG"
+        if output_format not in FORMAT_EXTENSIONS:
+            raise RequestError(f"Unsupported format '{output_format}'.")
+        for color_param in ("color", "outline_color"):
+            if color_param in params:
+                try:
+                    ImageColor.getrgb(params[color_param])
+                except (ValueError, TypeError, AttributeError):
+                    raise RequestError(f"Invalid {color_param} '{params[color_param]}'.")
+        text = _get_string_param(params, "text", "")
+        unicode_text = _get_string_param(params, "unicode_text")
+        try:
+            font_size_px = int(params.get("size", 100))
+            render_args = {
+                "text": text,
+                "unicode_text": unicode_text,
+                "ttf_path": self.fonts[font_name],
+                "font_size_px": font_size_px,
+                "text_y_offset_percent": float(params.get("y_offset", 50.0)),
+                "font_color": params.get("color", "white"),
+                "outline_color": params.get("outline_color", DEFAULT_OUTLINE_COLOR),
+                "qr_code_file_path": self.image_paths[qr_name] if qr_name else None,
+                "base_image_name": base_image_name,
+                "uploaded_image_bytes": uploaded_image_bytes,
+                "output_format": output_format,
+                "quality": int(params.get("quality", DEFAULT_QUALITY)),
+                "compress_level": int(params.get("compress_level", BULK_PNG_COMPRESS_LEVEL)),
+            }
+        except (ValueError, TypeError, OverflowError) as e:
+            raise RequestError(f"Invalid number: {e}")
+        if not math.isfinite(render_args["text_y_offset_percent"]):
+            raise RequestError("'y_offset' must be a finite number.")
+        if not 0 <= render_args["quality"] <= MAX_QUALITY:
+            raise RequestError(f"'quality' must be between 0 and {MAX_QUALITY}.")
+        if not 0 <= render_args["compress_level"] <= MAX_COMPRESS_LEVEL:
+            raise RequestError(f"'compress_level' must be between 0 and {MAX_COMPRESS_LEVEL}.")
+        if base_image_name and uploaded_image_bytes is None:
+            _check_font_size(font_size_px, self.base_images[base_image_name].height)
+        elif font_size_px <= 0:
+            raise RequestError(f"'size' must be positive, not {font_size_px}.")
+        return render_args
+
+    def _render(self, render_args, submitted_at):
+        started_at = time.perf_counter()
+        self.metrics.start_running()
+        self.metrics.observe("queue_wait", (started_at - submitted_at) * 1000)
+        try:
+            with collect_stage_timings() as stage_timings:
+                data = self._render_and_encode(render_args, started_at)
+            return data, stage_timings
+        finally:
+            self.metrics.finish_running()
+
+    def _render_and_encode(self, render_args, started_at):
+        text_to_draw = render_args["text"]
+        if render_args["unicode_text"]:
+            try:
+                text_to_draw = convert_unicode_to_legacy(render_args["unicode_text"], backend=self.conversion_backend)
+            except Exception as e:
+                print(f"❌ Sinhala text conversion failed: {e}")
+                raise RequestError("Sinhala text conversion failed. Send legacy-encoded 'text' instead, or run the "
+                                   "server with an offline conversion backend.", 502)
+
+        if render_args["uploaded_image_bytes"] is not None:
+            try:
+                with Image.open(io.BytesIO(render_args["uploaded_image_bytes"])) as uploaded:
+                    overlay = LayeredOverlay(ImageOps.exif_transpose(uploaded))
+            except OSError as e:
+                raise RequestError(f"Uploaded base image cannot be decoded: {e}")
+            _check_font_size(render_args["font_size_px"], overlay.base_image.height)
+        else:
+            overlay = self._get_overlay(render_args["base_image_name"])
+        try:
+            get_font(render_args["ttf_path"], render_args["font_size_px"])
+        except (OSError, ValueError) as e:
+            raise RequestError(f"Font cannot be loaded at size {render_args['font_size_px']}: {e}")
+
+        image = overlay.render(text_to_draw, render_args["ttf_path"], render_args["font_size_px"],
+                               text_y_offset_percent=render_args["text_y_offset_percent"],
+                               font_color=render_args["font_color"], outline_color=render_args["outline_color"],
+                               qr_code_file_path=render_args["qr_code_file_path"])
+        rendered_at = time.perf_counter()
+        self.metrics.observe("render", (rendered_at - started_at) * 1000)
+
+        data = encode_image(image, render_args["output_format"], quality=render_args["quality"],
+                            compress_level=render_args["compress_level"])
+        self.metrics.observe("encode", (time.perf_counter() - rendered_at) * 1000)
+        return data
+
+    def submit(self, render_args):
+        """
+        Queues a render and returns a Future for (encoded bytes, {stage: ms}), or raises RequestError(503) when full.
+        """
+        if not self.metrics.try_admit(self.max_in_flight):
+            raise RequestError("Render queue is full, retry shortly.", 503)
+        try:
+            return self._executor.submit(self._render, render_args, time.perf_counter())
+        except Exception:
+            self.metrics.cancel_queued()
+            raise
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    server_version = "SinhalaRender/1.0"
+
+    @property
+    def service(self):
+        return self.server.render_service
+
+    def log_message(self, format, *args):
+        pass # Per-request logging would dominate output under load; /metrics has the numbers
+
+    def _send(self, status, body, content_type, extra_headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for header, value in (extra_headers or {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.service.metrics.count_response(status) # Before the body, so a client that reads it sees itself in /metrics
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload, extra_headers=None):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8", extra_headers)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/metrics":
+            self._send_json(200, self.service.metrics.snapshot())
+        elif path == "/assets":
+            self._send_json(200, {"fonts": sorted(self.service.fonts), "images": sorted(self.service.image_paths)})
+        else:
+            self._send_json(404, {"error": f"No such endpoint '{path}'."})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/render":
+            self._send_json(404, {"error": f"No such endpoint '{url.path}'."})
+            return
+        start = time.perf_counter()
+        try:
+            params, uploaded_image_bytes = self._read_render_params(url.query)
+            render_args = self.service.parse_request(params, uploaded_image_bytes)
+            try:
+                data, stage_timings = self.service.submit(render_args).result(timeout=RENDER_TIMEOUT_S)
+            except FutureTimeoutError:
+                raise RequestError("Render timed out.", 504)
+        except RequestError as e:
+            headers = {"Retry-After": "1"} if e.status == 503 else None
+            self._send_json(e.status, {"error": str(e)}, headers)
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.service.metrics.observe("total", elapsed_ms)
+        server_timing = ", ".join(f"{stage};dur={ms:.2f}" for stage, ms in stage_timings.items())
+        self._send(200, data, CONTENT_TYPES[render_args["output_format"]],
+                   {"X-Render-Ms": f"{elapsed_ms:.1f}", "Server-Timing": server_timing})
+
+    def _read_render_params(self, query):
+        """
+        A JSON body carries the parameters (an uploaded base image goes in 'base_image_data' as base64).
+        Any other body is taken as the raw base image upload, with the parameters in the query string.
+        """
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise RequestError("Invalid Content-Length.")
+        if length > MAX_REQUEST_BYTES:
+            raise RequestError(f"Request body over {MAX_REQUEST_BYTES} bytes.", 413)
+        body = self.rfile.read(length) if length else b""
+        params = dict(parse_qsl(query))
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        if content_type == "application/json":
+            try:
+                body_params = json.loads(body.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise RequestError(f"Invalid JSON body: {e}")
+            if not isinstance(body_params, dict):
+                raise RequestError("JSON body must be an object.")
+            params.update(body_params)
+            return params, None
+        return params, body or None
+
+def create_render_server(host=DEFAULT_HOST, port=DEFAULT_PORT, image_paths=None, workers=None, max_queue=DEFAULT_MAX_QUEUE,
+                         conversion_backend=None):
+    """Builds the HTTP server without starting it; port 0 picks a free port (see server.server_address)."""
+    server = ThreadingHTTPServer((host, port), RenderRequestHandler)
+    server.daemon_threads = True
+    server.render_service = RenderService(image_paths=image_paths, workers=workers, max_queue=max_queue,
+                                          conversion_backend=conversion_backend)
+    return server
+
+def run_server(host=DEFAULT_HOST, port=DEFAULT_PORT, image_paths=None, workers=None, max_queue=DEFAULT_MAX_QUEUE,
+               conversion_backend=None):
+    server = create_render_server(host, port, image_paths, workers, max_queue, conversion_backend)
+    service = server.render_service
+    bound_host, bound_port = server.server_address[:2]
+    print(f"✅ Render server on http://{bound_host}:{bound_port} with {service.workers} workers, "
+          f"{len(service.fonts)} fonts and {len(service.base_images)} images preloaded.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("ℹ️ Shutting down render server.")
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,58 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Opt-in per-stage timing for the render pipeline. Nothing is measured unless a callback is set or the
+# current thread is inside collect_stage_timings(), so the pipeline pays one check per stage otherwise.
+
+# --- Stage names ---
+STAGE_CONVERT = "convert" # Unicode -> legacy text
+STAGE_FONT_LOAD = "font_load"
+STAGE_LAYOUT = "layout" # textbbox
+STAGE_FILL = "fill" # Glyph rasterization and tinting
+STAGE_OUTLINE = "outline" # Mask dilation
+STAGE_QR_LOAD = "qr_load" # QR decode and resize
+STAGE_COMPOSITE = "composite"
+STAGE_ENCODE = "encode"
+
+_stage_callback = None
+_local = threading.local()
+
+def set_stage_callback(callback):
+    """
+    Installs callback(stage, elapsed_ms) for every timed stage on any thread, e.g. to log where production
+    renders spend their time. Pass None to turn it off. Returns the previous callback.
+    """
+    global _stage_callback
+    previous = _stage_callback
+    _stage_callback = callback
+    return previous
+
+@contextmanager
+def collect_stage_timings():
+    """Collects {stage: total ms} for renders on the current thread inside the block."""
+    timings = {}
+    previous = getattr(_local, "timings", None)
+    _local.timings = timings
+    try:
+        yield timings
+    finally:
+        _local.timings = previous
+
+@contextmanager
+def stage_timer(stage):
+    """Times the block as `stage` when instrumentation is on."""
+    timings = getattr(_local, "timings", None)
+    callback = _stage_callback
+    if timings is None and callback is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed_ms
+        if callback is not None:
+            callback(stage, elapsed_ms)
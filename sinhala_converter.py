@@ -0,0 +1,236 @@
+import functools
+import json
+import sys
+import time
+import unicodedata
+
+# Offline Unicode -> legacy Sinhala ("font" format) converter.
+# The bundled fonts/ share the FM-style layout where Sinhala glyphs sit on Latin code points
+# (e.g. "l" = ක, "d" = ා, "f" = ෙ), so converting is a longest-match walk over a precompiled syllable trie.
+
+ZWJ = "\u200d"
+ZWNJ = "\u200c"
+HAL = "්"
+RAKARANSAYA = HAL + ZWJ + "ර"
+YANSAYA = HAL + ZWJ + "ය"
+REPAYA = "ර" + HAL + ZWJ
+
+LOCAL_OUTPUT_FORMATS = ("unicode", "font") # "isi" has no offline table and always goes to the web API
+
+CONSONANTS = {
+    "ක": "l", "ඛ": "L", "ග": ".", "ඝ": ">", "ඞ": "X", "ඟ": "Õ",
+    "ච": "p", "ඡ": "P", "ජ": "c", "ඣ": "C", "ඤ": "[", "ඥ": "{",
+    "ට": "g", "ඨ": "G", "ඩ": "v", "ඪ": "V", "ණ": "K", "ඬ": "~",
+    "ත": ";", "ථ": ":", "ද": "o", "ධ": "O", "න": "k", "ඳ": "|",
+    "ප": "m", "ඵ": "M", "බ": "n", "භ": "N", "ම": "u", "ඹ": "U",
+    "ය": "h", "ර": "r", "ල": ",", "ව": "j", "ශ": "Y", "ෂ": "I",
+    "ස": "i", "හ": "y", "ළ": "<", "ෆ": "*",
+    "ක්‍ෂ": "®", # conjunct with its own glyph
+}
+
+# Consonants whose ු/ූ is the hook that curls off the letter rather than the loop underneath
+HOOKED_U_CONSONANTS = {"ක", "ග", "ත", "භ", "ශ"}
+
+INDEPENDENT_VOWELS = {
+    "අ": "w", "ආ": "wd", "ඇ": "we", "ඈ": "wE", "ඉ": "b", "ඊ": "B",
+    "උ": "W", "ඌ": "W!", "ඍ": "R", "ඎ": "RD", "එ": "t", "ඒ": "ta",
+    "ඓ": "ft", "ඔ": "T", "ඕ": "´", "ඖ": "T!",
+}
+
+# Vowel signs as (prefix, suffix) around the consonant cluster. Short/long u are filled in per consonant.
+VOWEL_SIGNS = {
+    "": ("", ""),
+    HAL: ("", "a"),
+    "ා": ("", "d"),
+    "ැ": ("", "e"),
+    "ෑ": ("", "E"),
+    "ි": ("", "s"),
+    "ී": ("", "S"),
+    "ෘ": ("", "D"),
+    "ෲ": ("", "DD"),
+    "ෟ": ("", "!"),
+    "ෙ": ("f", ""),
+    "ේ": ("f", "a"),
+    "ෛ": ("ff", ""),
+    "ො": ("f", "d"),
+    "ෝ": ("f", "da"),
+    "ෞ": ("f", "!"),
+}
+
+# Syllables that the fonts draw with a dedicated glyph instead of base + sign
+SPECIAL_SYLLABLES = {
+    "රු": "/",
+    "රූ": "?",
+    "ළු": "¿",
+    "දු": "Þ",
+    "ඳු": "\\",
+    "ශ්‍රී": "Y%S",
+    "ර්": "¾",
+    "ර" + YANSAYA: "rH", # ර්‍ය is ර with a yansaya, not a repaya over ය
+}
+
+# Consonants the fonts draw with a dedicated glyph for each of ් (also under the kombuva of ේ), ි and ී, as
+# (hal, i, ii), e.g. "ú" is වි and "ï" is ම්. Other consonants take the plain sign after the letter.
+SIGN_LIGATURES = {
+    "ඛ": ("Ä", "Å", "Ç"),
+    "ච": ("É", "Ñ", "Ö"),
+    "ට": ("Ü", "á", "à"),
+    "ඩ": ("â", "ä", "ã"),
+    "ඬ": ("å", "ç", "é"),
+    "ධ": ("è", "ê", "ë"),
+    "බ": ("í", "ì", "î"),
+    "ම": ("ï", "ñ", "ó"),
+    "ඹ": ("ò", "ô", "ö"),
+    "ව": ("õ", "ú", "ù"),
+}
+
+MODIFIERS = {
+    "ං": "x",
+    "ඃ": "#",
+}
+
+# ASCII punctuation shares code points with Sinhala glyphs, so it moves to the slots the fonts keep for it
+PUNCTUATION = {
+    ".": "'", ",": '"', "(": "^", ")": "&", ":": "(", ";": "¦",
+    "?": "@", "!": "æ", "/": "$", "%": "]", "*": ")", "+": "¬",
+    "'": "Z", "×": "«", "÷": "\xad",
+}
+
+def _build_font_table():
+    """Expands consonant clusters x vowel signs into one flat Unicode -> legacy lookup table."""
+    table = {}
+    for consonant, legacy in CONSONANTS.items():
+        hooked = consonant in HOOKED_U_CONSONANTS
+        signs = dict(VOWEL_SIGNS)
+        signs["ු"] = ("", "=" if hooked else "q")
+        signs["ූ"] = ("", "+" if hooked else "Q")
+        clusters = {
+            consonant: legacy,
+            consonant + RAKARANSAYA: legacy + "%",
+            consonant + YANSAYA: legacy + "H",
+        }
+        for cluster, cluster_legacy in clusters.items():
+            for sign, (prefix, suffix) in signs.items():
+                table[cluster + sign] = prefix + cluster_legacy + suffix
+            # Repaya is drawn as a leading ර් in these fonts
+            for sign, (prefix, suffix) in signs.items():
+                table[REPAYA + cluster + sign] = prefix + "¾" + cluster_legacy + suffix
+    for consonant, (hal, short_i, long_i) in SIGN_LIGATURES.items():
+        for sign, (prefix, glyph) in {HAL: ("", hal), "ේ": ("f", hal), "ි": ("", short_i), "ී": ("", long_i)}.items():
+            table[consonant + sign] = prefix + glyph
+            table[REPAYA + consonant + sign] = prefix + "¾" + glyph
+    table.update(INDEPENDENT_VOWELS)
+    table.update(SPECIAL_SYLLABLES)
+    table.update(MODIFIERS)
+    table.update(PUNCTUATION)
+    return table
+
+def _build_trie(table):
+    """Nested-dict trie over the table keys; a node's None entry holds the legacy string for the path so far."""
+    trie = {}
+    for key, legacy in table.items():
+        node = trie
+        for character in key:
+            node = node.setdefault(character, {})
+        node[None] = legacy
+    return trie
+
+@functools.lru_cache(maxsize=None)
+def _get_font_trie():
+    """The lookup trie, built on the first conversion rather than at import so starting the app stays cheap."""
+    return _build_trie(_build_font_table())
+
+def convert_unicode_to_font(text):
+    """Converts Sinhala Unicode text to the legacy "font" encoding, taking the longest table match at each position."""
+    text = unicodedata.normalize("NFC", text)
+    font_trie = _get_font_trie()
+    output = []
+    position = 0
+    length = len(text)
+    while position < length:
+        node = font_trie
+        match = None
+        match_end = position
+        index = position
+        while index < length:
+            node = node.get(text[index])
+            if node is None:
+                break
+            index += 1
+            legacy = node.get(None)
+            if legacy is not None:
+                match = legacy
+                match_end = index
+        if match is None:
+            character = text[position]
+            if character not in (ZWJ, ZWNJ): # Joiners left over outside a known cluster have no glyph
+                output.append(character)
+            position += 1
+        else:
+            output.append(match)
+            position = match_end
+    return "".join(output)
+
+def convert_unicode_to_legacy_local(text, output_format="font"):
+    if output_format == "unicode":
+        return text
+    if output_format == "font":
+        return convert_unicode_to_font(text)
+    raise Exception(f"Offline conversion does not support the '{output_format}' format.")
+
+# --- Golden corpus: record what the remote API returns, then check the local converter against it ---
+
+def record_golden(corpus_path, golden_path, output_format="font"):
+    """Sends every corpus line to the remote API and writes {"text", "format", "expected"} records."""
+    from font_utils import convert_unicode_to_legacy_remote
+
+    with open(corpus_path, encoding="utf-8") as corpus_file:
+        lines = [line.strip() for line in corpus_file if line.strip() and not line.startswith("#")]
+    with open(golden_path, "w", encoding="utf-8") as golden_file:
+        for text in lines:
+            expected = convert_unicode_to_legacy_remote(text, output_format)
+            golden_file.write(json.dumps({"text": text, "format": output_format, "expected": expected}, ensure_ascii=False) + "\n")
+    print(f"✅ Recorded {len(lines)} golden conversions to {golden_path}")
+
+def check_golden(golden_path):
+    """Compares the local converter with recorded API output. Returns the list of mismatches."""
+    mismatches = []
+    total = 0
+    with open(golden_path, encoding="utf-8") as golden_file:
+        for line in golden_file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            total += 1
+            actual = convert_unicode_to_legacy_local(record["text"], record.get("format", "font"))
+            if actual != record["expected"]:
+                mismatches.append({"text": record["text"], "expected": record["expected"], "actual": actual})
+    for mismatch in mismatches:
+        print(f"❌ {mismatch['text']!r}: expected {mismatch['expected']!r}, got {mismatch['actual']!r}")
+    print(f"ℹ️ {total - len(mismatches)}/{total} golden conversions match.")
+    return mismatches
+
+def time_conversion(corpus_path, repeat=1000):
+    with open(corpus_path, encoding="utf-8") as corpus_file:
+        paragraph = "\n".join(line.strip() for line in corpus_file if line.strip() and not line.startswith("#"))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        convert_unicode_to_font(paragraph)
+    per_call_us = (time.perf_counter() - start) / repeat * 1e6
+    print(f"ℹ️ {len(paragraph)} characters converted in {per_call_us:.1f} µs per call.")
+
+if __name__ == "__main__":
+    usage = "Usage: python sinhala_converter.py record CORPUS GOLDEN | check GOLDEN | time CORPUS"
+    if len(sys.argv) < 3:
+        print(usage)
+        sys.exit(2)
+    command = sys.argv[1]
+    if command == "record" and len(sys.argv) == 4:
+        record_golden(sys.argv[2], sys.argv[3])
+    elif command == "check":
+        sys.exit(1 if check_golden(sys.argv[2]) else 0)
+    elif command == "time":
+        time_conversion(sys.argv[2])
+    else:
+        print(usage)
+        sys.exit(2)
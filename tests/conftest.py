@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app is a set of top-level modules, not a package; make them importable from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,85 @@
+import io
+import json
+
+from PIL import Image
+
+import batch_render
+from batch_render import run_batch, summarize_results
+
+def test_summary_percentiles_ignore_failed_jobs():
+    records = [
+        {"index": 0, "status": "ok", "elapsed_ms": 100.0},
+        {"index": 1, "status": "error", "elapsed_ms": 0.2},
+        {"index": 2, "status": "ok", "elapsed_ms": 300.0},
+        {"index": 3, "status": "error", "elapsed_ms": 0.3},
+    ]
+    summary = summarize_results(records, 2.0)
+    assert summary["ok"] == 2 and summary["errors"] == 2
+    assert summary["p50_ms"] == 100.0
+    assert summary["p99_ms"] == 300.0
+    assert summary["error_p50_ms"] == 0.2
+    assert summary["images_per_second"] == 1.0
+
+def test_summary_of_all_failed_run_has_no_latency():
+    summary = summarize_results([{"index": 0, "status": "error", "elapsed_ms": 0.1}], 1.0)
+    assert summary["p50_ms"] == 0.0 and summary["errors"] == 1
+
+def test_worker_overlays_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_render, "_worker_overlays", batch_render.OrderedDict())
+    paths = []
+    for i in range(batch_render.WORKER_OVERLAY_CACHE_SIZE + 3):
+        path = tmp_path / f"base{i}.png"
+        Image.new("RGB", (8, 8), (i, 0, 0)).save(path)
+        paths.append(str(path))
+
+    first = batch_render._get_overlay(paths[0])
+    assert batch_render._get_overlay(paths[0]) is first
+    for path in paths[1:]:
+        batch_render._get_overlay(path)
+    assert len(batch_render._worker_overlays) == batch_render.WORKER_OVERLAY_CACHE_SIZE
+    assert paths[0] not in batch_render._worker_overlays
+    assert batch_render._get_overlay(paths[-1]) is batch_render._worker_overlays[paths[-1]][1]
+
+def test_run_batch_reports_bad_lines_and_keeps_going(tmp_path):
+    base_path = tmp_path / "base.png"
+    Image.new("RGB", (200, 120), "navy").save(base_path)
+    job = {"base_image": str(base_path), "font": "4u-arjun.ttf", "text": "weïv", "size": 40}
+    jobs_path = tmp_path / "jobs.jsonl"
+    jobs_path.write_text("\n".join([
+        json.dumps(job),
+        "{not json",
+        "",
+        "[1, 2]",
+        json.dumps({**job, "font": "missing.ttf"}),
+        json.dumps({**job, "output": str(tmp_path / "named.jpg")}),
+    ]) + "\n", encoding="utf-8")
+
+    results = io.StringIO()
+    summary = run_batch(str(jobs_path), workers=1, output_dir=str(tmp_path / "out"), results_stream=results)
+    records = [json.loads(line) for line in results.getvalue().splitlines()]
+
+    assert [record["index"] for record in records] == [0, 1, 2, 3, 4]
+    assert [record["status"] for record in records] == ["ok", "error", "error", "error", "ok"]
+    assert "Line 2 is not valid JSON" in records[1]["error"]
+    assert "Line 4 is not a JSON object" in records[2]["error"]
+    assert "missing.ttf" in records[3]["error"]
+    assert Image.open(records[0]["output"]).size == (200, 120)
+    assert Image.open(tmp_path / "named.jpg").format == "JPEG"
+    assert summary["jobs"] == 5 and summary["ok"] == 2 and summary["errors"] == 3
+
+def test_run_template_reports_failed_captions_and_keeps_going(tmp_path, monkeypatch):
+    def convert(caption):
+        if caption == "bad":
+            raise Exception("Sinhala text conversion API request timed out.")
+        return caption
+
+    monkeypatch.setattr(batch_render, "convert_unicode_to_legacy", convert)
+    base_path = tmp_path / "base.png"
+    Image.new("RGB", (200, 120), "navy").save(base_path)
+    captions_path = tmp_path / "captions.txt"
+    captions_path.write_text("weïv\nbad\n;uhs\n", encoding="utf-8")
+
+    summary = batch_render.run_template(str(base_path), str(captions_path), "4u-arjun.ttf", font_size_px=40,
+                                        output_dir=str(tmp_path / "out"))
+    assert summary["jobs"] == 3 and summary["ok"] == 2 and summary["errors"] == 1
+    assert sorted(path.name for path in (tmp_path / "out").iterdir()) == ["000000.png", "000002.png"]
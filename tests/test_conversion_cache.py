@@ -0,0 +1,109 @@
+import sqlite3
+import threading
+
+from font_utils import ConversionCache
+
+class _FailingWrites:
+    """Wraps a sqlite connection so every INSERT fails, as when the cache file is locked or the disk is full."""
+
+    def __init__(self, db):
+        self._db = db
+
+    def execute(self, sql, *args):
+        if sql.startswith("INSERT"):
+            raise sqlite3.OperationalError("database is locked")
+        return self._db.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+def test_failed_disk_write_still_resolves_owner_and_waiters(tmp_path):
+    cache = ConversionCache(db_path=str(tmp_path / "conversions.sqlite"))
+    cache._db = _FailingWrites(cache._db)
+    started, release = threading.Event(), threading.Event()
+
+    def convert(text, output_format):
+        started.set()
+        release.wait(5)
+        return text.upper()
+
+    owner_result, waiter_result = [], []
+    owner = threading.Thread(target=lambda: owner_result.append(cache.get_or_convert("abc", "font", convert)))
+    owner.start()
+    assert started.wait(5)
+    waiter = threading.Thread(target=lambda: waiter_result.append(cache.get_or_convert("abc", "font", convert)))
+    waiter.start()
+    while cache.stats()["coalesced"] == 0 and waiter.is_alive():
+        threading.Event().wait(0.01)
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert owner_result == ["ABC"] and waiter_result == ["ABC"]
+    assert not cache._in_flight
+    stats = cache.stats()
+    assert stats["disk_errors"] == 1 and stats["errors"] == 0
+    assert cache.get_or_convert("abc", "font", convert) == "ABC" # Served from memory
+    assert cache.stats()["hits"] == 1
+    cache.close()
+
+class _BlockingWrites(_FailingWrites):
+    """Wraps a sqlite connection so INSERTs wait, as when another batch worker holds the database lock."""
+
+    def __init__(self, db, release):
+        super().__init__(db)
+        self.writing = threading.Event()
+        self._release = release
+
+    def execute(self, sql, *args):
+        if sql.startswith("INSERT"):
+            self.writing.set()
+            self._release.wait(5)
+        return self._db.execute(sql, *args)
+
+def test_blocked_disk_write_does_not_hold_up_memory_hits(tmp_path):
+    cache = ConversionCache(db_path=str(tmp_path / "conversions.sqlite"))
+    assert cache.get_or_convert("cached", "font", lambda text, output_format: "C") == "C"
+    release = threading.Event()
+    cache._db = _BlockingWrites(cache._db, release)
+
+    writer = threading.Thread(target=cache.get_or_convert, args=("new", "font", lambda text, output_format: "N"))
+    writer.start()
+    try:
+        assert cache._db.writing.wait(5)
+        reader = threading.Thread(target=cache.get_or_convert, args=("cached", "font", None))
+        reader.start()
+        reader.join(1)
+        assert not reader.is_alive() # Served from memory while the write is stuck
+        assert cache.stats()["hits"] == 1
+    finally:
+        release.set()
+        writer.join(5)
+    assert not cache._in_flight
+    cache.close()
+
+def test_disk_entries_survive_a_new_cache(tmp_path):
+    db_path = str(tmp_path / "conversions.sqlite")
+    first = ConversionCache(db_path=db_path)
+    first.get_or_convert("abc", "font", lambda text, output_format: "ABC")
+    first.close()
+
+    second = ConversionCache(db_path=db_path)
+    assert second.get_or_convert("abc", "font", None) == "ABC"
+    assert second.stats()["disk_hits"] == 1 and second.stats()["misses"] == 0
+    second.close()
+
+def test_failed_conversion_is_not_cached(tmp_path):
+    cache = ConversionCache(db_path=str(tmp_path / "conversions.sqlite"))
+
+    def convert(text, output_format):
+        raise RuntimeError("API down")
+
+    for _ in range(2):
+        try:
+            cache.get_or_convert("abc", "font", convert)
+        except RuntimeError:
+            pass
+    assert not cache._in_flight
+    assert cache.stats()["errors"] == 2
+    cache.close()
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+import font_gallery
+
+from font_gallery import FontGallery, colorize_sample
+from font_utils import resource_path
+
+SAMPLE = "weïv ;uhs"
+FONTS = [resource_path(f"fonts/{name}") for name in ("4u-arjun.ttf", "4u-asiri.ttf")]
+
+def _no_rendering(*args, **kwargs):
+    raise AssertionError("the mask should have come from the cache")
+
+def test_masks_are_reused_from_the_disk_cache(tmp_path, monkeypatch):
+    first = FontGallery(SAMPLE, cache_dir=str(tmp_path))
+    masks = [first.get_mask(path) for path in FONTS]
+    assert len(os.listdir(tmp_path)) == len(FONTS)
+
+    monkeypatch.setattr(font_gallery, "render_sample_mask", _no_rendering)
+    second = FontGallery(SAMPLE, cache_dir=str(tmp_path))
+    for path, mask in zip(FONTS, masks):
+        assert second.get_loaded_mask(path) is None
+        assert np.array_equal(np.asarray(second.get_mask(path)), np.asarray(mask))
+        assert second.get_loaded_mask(path) is not None
+
+def test_other_sample_text_is_rendered_again(tmp_path):
+    FontGallery(SAMPLE, cache_dir=str(tmp_path)).get_mask(FONTS[0])
+    FontGallery("úys¿", cache_dir=str(tmp_path)).get_mask(FONTS[0])
+    assert len(os.listdir(tmp_path)) == 2
+
+def test_corrupt_cache_entry_is_rendered_again(tmp_path):
+    mask = FontGallery(SAMPLE, cache_dir=str(tmp_path)).get_mask(FONTS[0])
+    (cache_file,) = tmp_path.iterdir()
+    cache_file.write_bytes(b"not a png")
+    assert np.array_equal(np.asarray(FontGallery(SAMPLE, cache_dir=str(tmp_path)).get_mask(FONTS[0])), np.asarray(mask))
+
+def test_recolor_only_changes_the_color(tmp_path, monkeypatch):
+    gallery = FontGallery(SAMPLE, cache_dir=str(tmp_path))
+    mask = gallery.get_mask(FONTS[0])
+    monkeypatch.setattr(font_gallery, "render_sample_mask", _no_rendering)
+    red, blue = colorize_sample(gallery.get_mask(FONTS[0]), "red"), colorize_sample(gallery.get_mask(FONTS[0]), "blue")
+    assert red.mode == blue.mode == "RGBA"
+    assert np.array_equal(np.asarray(red.getchannel("A")), np.asarray(mask))
+    assert np.array_equal(np.asarray(blue.getchannel("A")), np.asarray(mask))
+    assert red.getpixel((0, 0))[:3] == (255, 0, 0) and blue.getpixel((0, 0))[:3] == (0, 0, 255)
+
+def test_build_reports_each_font(tmp_path):
+    gallery = FontGallery(SAMPLE, cache_dir=str(tmp_path), workers=2)
+    missing = str(tmp_path / "missing.ttf")
+    results = {}
+    try:
+        for future in gallery.build(FONTS + [missing], lambda path, mask, error: results.update({path: (mask, error)})):
+            future.result(30)
+    finally:
+        gallery.close()
+    assert all(isinstance(results[path][0], Image.Image) and results[path][1] is None for path in FONTS)
+    assert results[missing][0] is None and isinstance(results[missing][1], OSError)
+
+def test_unwritable_cache_folder_still_returns_masks(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("not a folder")
+    gallery = FontGallery(SAMPLE, cache_dir=str(blocker / "gallery"))
+    assert gallery.get_mask(FONTS[0]).mode == "L"
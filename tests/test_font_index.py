@@ -0,0 +1,60 @@
+import json
+import os
+import shutil
+
+import font_utils
+
+from font_utils import find_ttf_fonts, find_ttf_fonts_cached, resource_path
+
+def _font_folder(tmp_path, names=("4u-arjun.ttf", "4u-asiri.ttf")):
+    folder = tmp_path / "fonts"
+    folder.mkdir()
+    for name in names:
+        shutil.copy(resource_path(f"fonts/{name}"), folder / name)
+    (folder / "readme.txt").write_text("not a font")
+    return str(folder)
+
+def test_index_is_reused_while_the_folder_is_unchanged(tmp_path, monkeypatch):
+    folder = _font_folder(tmp_path)
+    index_path = str(tmp_path / "cache" / "font_index.json")
+    fonts = find_ttf_fonts_cached(folder, index_path)
+    assert sorted(fonts) == sorted(find_ttf_fonts(folder))
+    assert os.path.exists(index_path)
+
+    def no_scan(folder_path):
+        raise AssertionError("the index should have been used")
+
+    monkeypatch.setattr(font_utils, "find_ttf_fonts", no_scan)
+    assert find_ttf_fonts_cached(folder, index_path) == fonts
+
+def test_index_is_rebuilt_when_the_folder_changes(tmp_path):
+    folder = _font_folder(tmp_path)
+    index_path = str(tmp_path / "font_index.json")
+    find_ttf_fonts_cached(folder, index_path)
+    shutil.copy(resource_path("fonts/4u-chami.ttf"), os.path.join(folder, "4u-chami.ttf"))
+    os.remove(os.path.join(folder, "4u-arjun.ttf"))
+    stat = os.stat(folder)
+    os.utime(folder, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5 * 10**9)) # Filesystem clocks can be too coarse to see the edit
+    assert sorted(os.path.basename(path) for path in find_ttf_fonts_cached(folder, index_path)) == ["4u-asiri.ttf", "4u-chami.ttf"]
+
+def test_folders_share_one_index(tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    shutil.copy(resource_path("fonts/4u-arjun.ttf"), first / "4u-arjun.ttf")
+    shutil.copy(resource_path("fonts/4u-asiri.ttf"), second / "4u-asiri.ttf")
+    index_path = str(tmp_path / "font_index.json")
+    assert find_ttf_fonts_cached(str(first), index_path) == [str(first / "4u-arjun.ttf")]
+    assert find_ttf_fonts_cached(str(second), index_path) == [str(second / "4u-asiri.ttf")]
+    with open(index_path, encoding="utf-8") as index_file:
+        assert len(json.load(index_file)["folders"]) == 2
+
+def test_unreadable_or_old_index_is_ignored(tmp_path):
+    folder = _font_folder(tmp_path)
+    index_path = tmp_path / "font_index.json"
+    for contents in ("{broken", json.dumps({"version": -1, "folders": {os.path.abspath(folder): {"stamp": 0, "fonts": []}}})):
+        index_path.write_text(contents, encoding="utf-8")
+        assert len(find_ttf_fonts_cached(folder, str(index_path))) == 2
+
+def test_missing_folder_has_no_fonts(tmp_path):
+    assert find_ttf_fonts_cached(str(tmp_path / "missing"), str(tmp_path / "font_index.json")) == []
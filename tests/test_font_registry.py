@@ -0,0 +1,43 @@
+import os
+
+from font_registry import FontRegistry
+from font_utils import resource_path
+
+FONTS = [resource_path(f"fonts/{name}") for name in ("4u-arjun.ttf", "4u-asiri.ttf", "4u-chami.ttf")]
+
+def test_fonts_are_cached_per_size():
+    registry = FontRegistry()
+    font = registry.get_font(FONTS[0], 40)
+    assert registry.get_font(FONTS[0], 40) is font
+    assert registry.get_font(FONTS[0], 41) is not font
+    stats = registry.stats()
+    assert stats["font_hits"] == 1 and stats["font_loads"] == 2
+
+def test_least_recently_used_font_is_evicted_with_its_bboxes():
+    # Room for the first font and either of the others, not all three
+    sizes = [os.path.getsize(path) for path in FONTS]
+    registry = FontRegistry(max_bytes=sizes[0] + max(sizes[1:]))
+    first = registry.get_font(FONTS[0], 40)
+    registry.get_text_bbox(FONTS[1], 40, "weïv")
+    assert registry.get_font(FONTS[0], 40) is first # Now the most recently used
+    registry.get_font(FONTS[2], 40)
+
+    stats = registry.stats()
+    assert stats["font_evictions"] == 1 and stats["fonts"] == 2 and stats["bboxes"] == 0
+    assert stats["font_bytes"] == sizes[0] + sizes[2]
+    assert registry.get_font(FONTS[0], 40) is first
+    registry.get_text_bbox(FONTS[1], 40, "weïv") # Reloaded and measured again
+    assert registry.stats()["bbox_misses"] == 2
+
+def test_font_over_the_cap_is_still_returned():
+    registry = FontRegistry(max_bytes=1)
+    assert registry.get_font(FONTS[0], 40) is registry.get_font(FONTS[0], 40)
+    registry.get_font(FONTS[1], 40)
+    assert registry.stats()["fonts"] == 1
+
+def test_bbox_cache_is_bounded():
+    registry = FontRegistry(max_bbox_entries=2)
+    boxes = [registry.get_text_bbox(FONTS[0], 40, text) for text in ("w", "we", "weï")]
+    assert registry.stats()["bboxes"] == 2
+    assert registry.get_text_bbox(FONTS[0], 40, "weï") == boxes[2]
+    assert registry.stats()["bbox_hits"] == 1
@@ -0,0 +1,118 @@
+import os
+
+import pytest
+from PIL import Image, ExifTags, JpegImagePlugin
+
+from image_utils import DecodedImageCache, get_image_size
+
+def _two_tone(size, first="red", second="blue"):
+    """Left half `first`, right half `second`."""
+    image = Image.new("RGB", size, second)
+    image.paste(first, (0, 0, size[0] // 2, size[1]))
+    return image
+
+def _save_rotated_jpeg(path, size=(200, 100)):
+    """A JPEG stored landscape with EXIF Orientation=6, i.e. shown rotated 90° clockwise (portrait)."""
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    _two_tone(size).save(path, "JPEG", quality=95, exif=exif)
+
+def _is_close(pixel, color, tolerance=40):
+    return all(abs(a - b) <= tolerance for a, b in zip(pixel, color))
+
+def test_exif_orientation_is_applied(tmp_path):
+    path = str(tmp_path / "rotated.jpg")
+    _save_rotated_jpeg(path)
+    image = DecodedImageCache().get(path)
+    assert image.size == get_image_size(path) == (100, 200)
+    # Turning clockwise brings the stored left (red) half to the top
+    assert _is_close(image.getpixel((50, 20)), (255, 0, 0))
+    assert _is_close(image.getpixel((50, 180)), (0, 0, 255))
+
+def test_exif_orientation_is_applied_to_previews(tmp_path):
+    path = str(tmp_path / "rotated.jpg")
+    _save_rotated_jpeg(path, (800, 400))
+    image = DecodedImageCache().get(path, (50, 100)) # Fits the displayed portrait shape exactly
+    assert image.size == (50, 100)
+    assert _is_close(image.getpixel((25, 10)), (255, 0, 0))
+    assert _is_close(image.getpixel((25, 90)), (0, 0, 255))
+
+@pytest.mark.parametrize("max_size", [None, (40, 40)])
+def test_palette_png_loads(tmp_path, max_size):
+    path = str(tmp_path / "palette.png")
+    _two_tone((80, 40)).convert("P", palette=Image.Palette.ADAPTIVE, colors=4).save(path)
+    image = DecodedImageCache().get(path, max_size)
+    assert image.size == ((40, 20) if max_size else (80, 40))
+    pixels = image.convert("RGB")
+    assert _is_close(pixels.getpixel((2, 2)), (255, 0, 0))
+    assert _is_close(pixels.getpixel((image.width - 3, 2)), (0, 0, 255))
+
+def test_large_jpeg_is_drafted_before_resizing(tmp_path, monkeypatch):
+    path = str(tmp_path / "large.jpg")
+    _two_tone((1600, 1200)).save(path, "JPEG", quality=90)
+    drafts = []
+    draft = JpegImagePlugin.JpegImageFile.draft
+
+    def recording_draft(self, mode, size):
+        result = draft(self, mode, size)
+        drafts.append(self.size)
+        return result
+
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, "draft", recording_draft)
+    image = DecodedImageCache().get(path, (200, 200))
+    assert image.size == (200, 150)
+    assert drafts == [(200, 150)] # The decoder scaled by 1/8 itself
+    assert _is_close(image.getpixel((20, 75)), (255, 0, 0))
+
+def test_large_png_is_reduced_before_resizing(tmp_path, monkeypatch):
+    path = str(tmp_path / "large.png")
+    _two_tone((1600, 1200)).save(path)
+    factors = []
+    reduce = Image.Image.reduce
+
+    def recording_reduce(self, factor, *args, **kwargs):
+        factors.append(factor)
+        return reduce(self, factor, *args, **kwargs)
+
+    monkeypatch.setattr(Image.Image, "reduce", recording_reduce)
+    image = DecodedImageCache().get(path, (100, 100))
+    assert image.size == (100, 75)
+    assert factors == [8] # 16x down, stopping 2x above the target for the LANCZOS pass
+    assert _is_close(image.getpixel((10, 40)), (255, 0, 0))
+
+def test_edited_file_is_reloaded(tmp_path):
+    path = str(tmp_path / "edited.png")
+    Image.new("RGB", (10, 10), "red").save(path)
+    cache = DecodedImageCache()
+    assert cache.get(path).getpixel((0, 0)) == (255, 0, 0)
+    assert cache.get(path).getpixel((0, 0)) == (255, 0, 0)
+
+    Image.new("RGB", (10, 10), "blue").save(path)
+    modified_time = os.path.getmtime(path) + 5 # Filesystem clocks can be too coarse to see the edit
+    os.utime(path, (modified_time, modified_time))
+    assert cache.get(path).getpixel((0, 0)) == (0, 0, 255)
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+def test_least_recently_used_image_is_evicted(tmp_path):
+    paths = []
+    for name in ("a", "b", "c"):
+        paths.append(str(tmp_path / f"{name}.png"))
+        Image.new("RGB", (10, 10), "red").save(paths[-1])
+    cache = DecodedImageCache(max_bytes=700) # Room for two 300-byte images
+    first = cache.get(paths[0])
+    cache.get(paths[1])
+    assert cache.get(paths[0]) is first # Now the most recently used
+    cache.get(paths[2])
+    stats = cache.stats()
+    assert stats["images"] == 2 and stats["bytes"] == 600 and stats["evictions"] == 1
+    assert cache.get(paths[0]) is first # Still cached; the second image went instead
+    assert cache.stats()["misses"] == 3
+
+def test_image_over_the_cap_is_still_returned(tmp_path):
+    path = str(tmp_path / "big.png")
+    Image.new("RGB", (20, 20), "red").save(path)
+    cache = DecodedImageCache(max_bytes=100)
+    image = cache.get(path)
+    assert image.size == (20, 20)
+    assert cache.stats()["images"] == 1
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from benchmark import BENCH_FONT, BENCH_TEXT
+from font_utils import resource_path
+from image_utils import LayeredOverlay, generate_overlayed_image, render_many
+
+QR_CODE = "qr_code.png"
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA"])
+def test_layered_overlay_matches_generate_overlayed_image(mode):
+    # 50% of an even height is a whole pixel, so the overlay's snapped text top is the exact same position
+    base = Image.new(mode, (640, 400), (40, 90, 160))
+    ttf_path = resource_path(BENCH_FONT)
+    qr_path = resource_path(QR_CODE)
+    expected = generate_overlayed_image(base, BENCH_TEXT, ttf_path, 60, 50.0, "yellow", qr_code_file_path=qr_path)
+    actual = LayeredOverlay(base).render(BENCH_TEXT, ttf_path, 60, 50.0, "yellow", qr_code_file_path=qr_path)
+    assert actual.mode == expected.mode == "RGBA"
+    assert np.array_equal(np.asarray(actual), np.asarray(expected))
+    assert np.asarray(actual)[..., 3].min() == 255 # The QR code never punches holes in an opaque base
+
+def test_render_many_stacks_the_qr_code_over_the_text():
+    # At 72% of 400 px the captions run into the QR code in the bottom-left corner
+    base = Image.new("RGB", (640, 400), (40, 90, 160))
+    ttf_path = resource_path(BENCH_FONT)
+    qr_path = resource_path(QR_CODE)
+    captions = ["weïv ;uhs weïv ;uhs", "úys¿ kï b;sx úys¿ kï"]
+    rendered = list(render_many(base, captions, ttf_path, 90, 72.0, "white", qr_code_file_path=qr_path))
+    for caption, image in zip(captions, rendered):
+        expected = generate_overlayed_image(base, caption, ttf_path, 90, 72.0, "white", qr_code_file_path=qr_path)
+        assert np.array_equal(np.asarray(image), np.asarray(expected))
+
+def test_render_many_yields_failed_captions_as_errors():
+    base = Image.new("RGB", (200, 100), "black")
+    failed = ValueError("conversion failed")
+    rendered = list(render_many(base, ["weïv", failed, "weïv"], resource_path(BENCH_FONT), 30))
+    assert rendered[1] is failed
+    assert all(isinstance(image, Image.Image) for image in (rendered[0], rendered[2]))
+
+@pytest.mark.parametrize("offset_percent", [33.3, 12.7, 61.9])
+def test_layered_overlay_snaps_the_text_top_to_a_whole_pixel(offset_percent):
+    # 301 px high, so these offsets fall between pixels; the overlay matches generate_overlayed_image at the
+    # offset of the nearest whole pixel and nowhere else differs
+    base = Image.new("RGB", (640, 301), (40, 90, 160))
+    ttf_path = resource_path(BENCH_FONT)
+    actual = np.asarray(LayeredOverlay(base).render(BENCH_TEXT, ttf_path, 60, offset_percent, "yellow"))
+    snapped_percent = 100.0 * round(base.height * offset_percent / 100.0) / base.height
+    snapped = generate_overlayed_image(base, BENCH_TEXT, ttf_path, 60, snapped_percent, "yellow")
+    assert np.array_equal(actual, np.asarray(snapped))
+    unsnapped = generate_overlayed_image(base, BENCH_TEXT, ttf_path, 60, offset_percent, "yellow")
+    assert not np.array_equal(actual, np.asarray(unsnapped))
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA"])
+def test_in_place_render_matches_the_copy(mode):
+    # A base with some transparency so the RGBA path blends real alpha; RGB drops it and uses the paste path
+    pixels = np.zeros((400, 640, 4), dtype=np.uint8)
+    pixels[..., 0] = np.linspace(0, 255, 640, dtype=np.uint8)
+    pixels[..., 2] = 160
+    pixels[..., 3] = np.linspace(255, 96, 400, dtype=np.uint8)[:, None]
+    base = Image.fromarray(pixels, "RGBA").convert(mode)
+    ttf_path = resource_path(BENCH_FONT)
+    qr_path = resource_path(QR_CODE)
+    expected = generate_overlayed_image(base, BENCH_TEXT, ttf_path, 90, 72.0, "yellow", qr_code_file_path=qr_path)
+
+    target = base.copy()
+    result = generate_overlayed_image(target, BENCH_TEXT, ttf_path, 90, 72.0, "yellow", qr_code_file_path=qr_path, in_place=True)
+    assert result is target and result.mode == mode
+    assert np.array_equal(np.asarray(result), np.asarray(expected.convert(mode)))
+
+@pytest.mark.parametrize("mode", ["L", "P", "LA", "CMYK"])
+def test_in_place_render_rejects_other_modes(mode):
+    base = Image.new(mode, (64, 48))
+    with pytest.raises(ValueError):
+        generate_overlayed_image(base, BENCH_TEXT, resource_path(BENCH_FONT), 20, in_place=True)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageFilter, ImageFont
+
+from benchmark import draw_outlined_text_legacy, draw_outlined_text_masked, BENCH_BASE_IMAGE, BENCH_FONT, BENCH_TEXT
+from font_utils import resource_path
+from image_utils import get_outline_strength, render_text_masks
+
+# The mask outline is one dilation of the antialiased glyph; the legacy loop stamped the glyph at every
+# offset, so the two may only disagree on the antialiased outer edge of the outline. Everywhere else
+# (fill, outline body, background) they must match.
+OFF_EDGE_TOLERANCE = 1
+
+@pytest.fixture(scope="module")
+def base_image():
+    return Image.open(resource_path(BENCH_BASE_IMAGE)).convert("RGBA")
+
+def _outer_edge_band(text_masks, image_size):
+    """Pixels within one pixel of the outline mask's boundary, in image coordinates."""
+    _, outline_mask, position = text_masks
+    placed = Image.new("L", image_size, 0)
+    placed.paste(outline_mask, position)
+    grown = np.asarray(placed.filter(ImageFilter.MaxFilter(3)))
+    shrunk = np.asarray(placed.filter(ImageFilter.MinFilter(3)))
+    return (grown > 0) & (shrunk < 255)
+
+@pytest.mark.parametrize("font_size_px", [25, 50, 100, 200, 300])
+def test_masked_outline_matches_legacy_off_the_outer_edge(base_image, font_size_px):
+    font = ImageFont.truetype(resource_path(BENCH_FONT), font_size_px)
+    outline_strength = get_outline_strength(font_size_px)
+    origin = (base_image.width * 0.1, base_image.height * 0.2)
+    legacy_image, masked_image = base_image.copy(), base_image.copy()
+    draw_outlined_text_legacy(legacy_image, BENCH_TEXT, font, origin, outline_strength, "#ffffff")
+    draw_outlined_text_masked(masked_image, BENCH_TEXT, font, origin, outline_strength, "#ffffff")
+
+    diff = np.abs(np.asarray(legacy_image, dtype=np.int16) - np.asarray(masked_image, dtype=np.int16)).max(axis=2)
+    edge = _outer_edge_band(render_text_masks(BENCH_TEXT, font, origin, outline_strength), base_image.size)
+    assert diff[~edge].max() <= OFF_EDGE_TOLERANCE
@@ -0,0 +1,82 @@
+import io
+import threading
+
+import pytest
+from PIL import Image
+
+from output_utils import DirectorySink, ImageWriter, MemorySink, encode_image, format_from_path, save_image
+
+def _half_transparent():
+    """Left half opaque red, right half fully transparent."""
+    image = Image.new("RGBA", (40, 20), (0, 0, 0, 0))
+    image.paste((255, 0, 0, 255), (0, 0, 20, 20))
+    return image
+
+@pytest.mark.parametrize("output_format", ["JPEG", "jpg"])
+def test_jpeg_flattens_alpha_onto_the_background(output_format):
+    decoded = Image.open(io.BytesIO(encode_image(_half_transparent(), output_format, quality=95, background="blue")))
+    assert decoded.format == "JPEG" and decoded.mode == "RGB"
+    red, green, blue = decoded.getpixel((5, 10))
+    assert red > 200 and green < 50 and blue < 50
+    red, green, blue = decoded.getpixel((35, 10))
+    assert red < 50 and green < 50 and blue > 200
+
+@pytest.mark.parametrize("output_format", ["PNG", "WEBP"])
+def test_formats_with_alpha_keep_it(output_format):
+    decoded = Image.open(io.BytesIO(encode_image(_half_transparent(), output_format, quality=100)))
+    assert decoded.format == output_format
+    assert decoded.convert("RGBA").getpixel((35, 10))[3] == 0
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        encode_image(_half_transparent(), "BMP")
+
+def test_save_image_follows_the_extension(tmp_path):
+    path = save_image(_half_transparent(), str(tmp_path / "out.jpeg"))
+    assert format_from_path(path) == "JPEG"
+    with Image.open(path) as saved:
+        assert saved.format == "JPEG"
+
+def test_memory_sink_keeps_every_output():
+    sink = MemorySink()
+    with ImageWriter(sink, "png", workers=2) as writer:
+        futures = [writer.submit(f"{index:03d}", _half_transparent()) for index in range(5)]
+    assert [future.result() for future in futures] == [f"{index:03d}.png" for index in range(5)]
+    assert sorted(sink.outputs) == [f"{index:03d}.png" for index in range(5)]
+    assert all(Image.open(io.BytesIO(data)).size == (40, 20) for data in sink.outputs.values())
+
+def test_directory_sink_writes_files(tmp_path):
+    with ImageWriter(DirectorySink(str(tmp_path / "out")), "webp") as writer:
+        future = writer.submit("frame", _half_transparent())
+    assert future.result() == str(tmp_path / "out" / "frame.webp")
+    assert (tmp_path / "out" / "frame.webp").stat().st_size > 0
+
+class _BlockingSink(MemorySink):
+    """A sink whose writes wait until released, as with a slow disk."""
+
+    def __init__(self, release):
+        super().__init__()
+        self._release = release
+
+    def write(self, file_name, data):
+        self._release.wait(10)
+        return super().write(file_name, data)
+
+def test_submit_blocks_once_max_pending_writes_are_outstanding():
+    release = threading.Event()
+    sink = _BlockingSink(release)
+    writer = ImageWriter(sink, workers=1, max_pending=2)
+    try:
+        writer.submit("first", _half_transparent())
+        writer.submit("second", _half_transparent())
+        third = threading.Thread(target=writer.submit, args=("third", _half_transparent()))
+        third.start()
+        third.join(0.5)
+        assert third.is_alive() # Waiting for a free slot
+        release.set()
+        third.join(10)
+        assert not third.is_alive()
+    finally:
+        release.set()
+        writer.close()
+    assert sorted(sink.outputs) == ["first.png", "second.png", "third.png"]
@@ -0,0 +1,163 @@
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+from PIL import Image, ImageChops
+
+import font_utils
+
+from font_utils import resource_path
+from render_server import create_render_server
+
+FONT = "4u-arjun.ttf"
+BASE_IMAGE = "jokes_bg.png"
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(**options):
+        server = create_render_server(port=0, image_paths=[resource_path(BASE_IMAGE), resource_path("qr_code.png")],
+                                      workers=1, max_queue=0, **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+        server.render_service.close()
+
+@pytest.fixture
+def server(start_server):
+    return start_server()
+
+def _request(server, path, body=None, content_type="application/json"):
+    """(status, headers, body bytes) for a GET, or a POST when body is given (dicts are sent as JSON)."""
+    host, port = server.server_address[:2]
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body).encode("utf-8")
+    request = urllib.request.Request(f"http://{host}:{port}{path}", data=body,
+                                     headers={"Content-Type": content_type} if body is not None else {})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+def test_render_returns_image(server):
+    status, headers, body = _request(server, "/render", {"font": FONT, "base_image": BASE_IMAGE, "text": "weïv",
+                                                         "size": 60, "qr": "qr_code.png"})
+    assert status == 200
+    assert headers["Content-Type"] == "image/png"
+    assert "Server-Timing" in headers
+    assert Image.open(io.BytesIO(body)).size == (1536, 1024)
+
+@pytest.mark.parametrize("params", [
+    {"size": 0},
+    {"size": -5},
+    {"size": "big"},
+    {"size": None},
+    {"text": 5},
+    {"unicode_text": ["ශ්‍රී"]},
+    {"font": ["x"]},
+    {"base_image": {"name": BASE_IMAGE}},
+    {"color": "not-a-color"},
+    {"y_offset": float("nan")},
+    {"y_offset": "Infinity"},
+    {"y_offset": "-inf"},
+    {"compress_level": 99},
+    {"compress_level": -1},
+    {"format": "webp", "quality": -5},
+    {"format": "jpeg", "quality": 500},
+    {"size": 100000},
+    {"size": 1025}, # One over the base image height
+    {"size": 1e999},
+])
+def test_bad_params_are_client_errors(server, params):
+    request = {"font": FONT, "base_image": BASE_IMAGE, "text": "weïv", **params}
+    status, _, body = _request(server, "/render", request)
+    assert status == 400, body
+    assert "error" in json.loads(body)
+
+def test_size_is_capped_at_uploaded_image_height(server):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), "white").save(buffer, "PNG")
+    status, _, body = _request(server, f"/render?font={FONT}&text=x&size=49", buffer.getvalue(), "image/png")
+    assert status == 400, body
+    status, _, body = _request(server, f"/render?font={FONT}&text=x&size=48", buffer.getvalue(), "image/png")
+    assert status == 200, body
+
+@pytest.mark.parametrize("body", [b"[1, 2]", b"\"text\"", b"{not json"])
+def test_non_object_json_body_is_a_client_error(server, body):
+    status, _, _ = _request(server, "/render", body)
+    assert status == 400
+
+def test_full_queue_is_rejected_with_503(server):
+    service = server.render_service
+    release = threading.Event()
+    render_and_encode = service._render_and_encode
+
+    def blocked_render(render_args, started_at):
+        release.wait(10)
+        return render_and_encode(render_args, started_at)
+
+    service._render_and_encode = blocked_render
+    request = {"font": FONT, "base_image": BASE_IMAGE, "text": "weïv", "size": 40}
+    first = []
+    thread = threading.Thread(target=lambda: first.append(_request(server, "/render", request)))
+    thread.start()
+    try:
+        for _ in range(500):
+            if service.metrics.snapshot()["running"] == 1:
+                break
+            threading.Event().wait(0.01)
+        status, headers, _ = _request(server, "/render", request)
+        assert status == 503
+        assert headers["Retry-After"] == "1"
+    finally:
+        release.set()
+        thread.join(30)
+    assert first[0][0] == 200
+
+def test_metrics_count_responses_and_latency(server):
+    _request(server, "/render", {"font": FONT, "base_image": BASE_IMAGE, "text": "weïv", "size": 40})
+    _request(server, "/render", {"font": FONT, "base_image": BASE_IMAGE, "size": 0})
+    status, _, body = _request(server, "/metrics")
+    assert status == 200
+    metrics = json.loads(body)
+    assert metrics["responses"] == {"200": 1, "400": 1}
+    assert metrics["latency_ms"]["total"]["count"] == 1
+    assert metrics["queue_depth"] == 0 and metrics["running"] == 0
+
+def test_unicode_text_converts_offline(start_server):
+    server = start_server(conversion_backend="local")
+    request = {"font": FONT, "base_image": BASE_IMAGE, "size": 60}
+    status, _, converted = _request(server, "/render", {**request, "unicode_text": "ශ්‍රී ලංකාව"})
+    assert status == 200, converted
+    status, _, legacy = _request(server, "/render", {**request, "text": "Y%S ,xldj"})
+    assert status == 200
+    assert ImageChops.difference(Image.open(io.BytesIO(converted)), Image.open(io.BytesIO(legacy))).getbbox() is None
+
+def test_failed_remote_conversion_is_a_502(start_server, monkeypatch):
+    def unreachable(text, output_format="font"):
+        raise Exception("Sinhala text conversion API request failed: NameResolutionError")
+
+    monkeypatch.setattr(font_utils, "convert_unicode_to_legacy_remote", unreachable)
+    server = start_server(conversion_backend="remote")
+    status, _, body = _request(server, "/render", {"font": FONT, "base_image": BASE_IMAGE, "unicode_text": "අලුත් වාක්‍යයක්"})
+    assert status == 502
+    assert "NameResolutionError" not in json.loads(body)["error"]
+
+def test_worker_overlays_share_the_preloaded_base(server):
+    _request(server, "/render", {"font": FONT, "base_image": BASE_IMAGE, "text": "weïv", "size": 40})
+    service = server.render_service
+    overlays = []
+    thread = threading.Thread(target=lambda: overlays.append(service._get_overlay(BASE_IMAGE)))
+    thread.start()
+    thread.join(5)
+    assert overlays[0].base_image is service.base_images[BASE_IMAGE]
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from font_utils import convert_unicode_to_legacy, CONVERSION_BACKEND_LOCAL, DEFAULT_CONVERSION_BACKEND, CONVERSION_BACKEND_ENV
+from sinhala_converter import convert_unicode_to_font, check_golden
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "transliteration_golden.jsonl")
+
+# The offline table's current output, pinned so table edits show up as diffs. These agree with the usual
+# FM-layout mapping but are not recorded API answers; transliteration_golden.jsonl is the real reference.
+PINNED_CONVERSIONS = [
+    ("සිංහල පෙළ", "isxy, fm<"),
+    ("අම්මා ගෙදර ගියා.", "wïud f.or .shd'"),
+    # The API's answer for the start of gui_app.SAMPLE_PREVIEW_TEXT
+    ("විහිළු නම් ඉතිං", "úys¿ kï b;sx"),
+    # Consonants with dedicated ් / ි / ී glyphs, also under repaya and ේ
+    ("ටිකක් ඩිංගක් බිම ධීවර චිත්‍රය", "álla äx.la ìu ëjr Ñ;%h"),
+    ("මේ කර්මිෂ්ඨ ව්‍යාපාරය", "fï l¾ñIaG jHdmdrh"),
+    # Rakaransaya and yansaya conjuncts
+    ("ප්‍රශ්නය ක්‍රමය ග්‍රාමය ද්‍රව්‍ය", "m%Yakh l%uh .%duh o%jH"),
+    ("වාක්‍යය විද්‍යාව සත්‍යය", "jdlHh úoHdj i;Hh"),
+    # Repaya
+    ("ධර්මය කර්මය වර්ෂය", "O¾uh l¾uh j¾Ih"),
+    ("ශ්‍රී ලංකාව", "Y%S ,xldj"),
+    ("ක්‍ෂණික ලක්‍ෂය", "®Ksl ,®h"),
+    # Punctuation is remapped in these fonts
+    ("ඩුබායි, ටොපි (ටෝපි)? හරි!", 'vqndhs" fgdms ^fgdams&@ yrsæ'),
+    # Hooked u signs and the dedicated රු/රූ/දු glyphs
+    ("කුරුල්ලා ගසේ උඩ", "l=/,a,d .fia Wv"),
+    ("රුපියල් රූපය", "/msh,a ?mh"),
+    ("දුක සතුට 2024 අංක 15", "Þl i;=g 2024 wxl 15"),
+    # Two-part vowel signs and independent vowels
+    ("කෙසෙල් කේක් කෛලාස කොළ කෝපි කෞතුක", "flfi,a flala ffl,di fld< fldams fl!;=l"),
+    ("ඇතැම් ඈත ඊයේ ඌරා ඒක ඕනෑ", "we;eï wE; Bfha W!rd tal ´kE"),
+    ("ගඟ අඬයි හඳ අඹ", ".Õ w~hs y| wU"),
+]
+
+@pytest.mark.parametrize("unicode_text, legacy_text", PINNED_CONVERSIONS)
+def test_offline_conversion_is_pinned(unicode_text, legacy_text):
+    assert convert_unicode_to_font(unicode_text) == legacy_text
+    assert convert_unicode_to_legacy(unicode_text, backend=CONVERSION_BACKEND_LOCAL) == legacy_text
+
+def test_remote_is_default_until_golden_corpus_is_checked():
+    if os.environ.get(CONVERSION_BACKEND_ENV):
+        pytest.skip(f"{CONVERSION_BACKEND_ENV} overrides the default")
+    assert DEFAULT_CONVERSION_BACKEND == "remote"
+
+@pytest.mark.skipif(not os.path.exists(GOLDEN_PATH), reason="record it with: python sinhala_converter.py record transliteration_corpus.txt transliteration_golden.jsonl")
+def test_offline_conversion_matches_recorded_api_output():
+    assert check_golden(GOLDEN_PATH) == []
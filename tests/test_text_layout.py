@@ -0,0 +1,58 @@
+import pytest
+
+from benchmark import BENCH_FONT
+from font_registry import get_text_bbox
+from font_utils import resource_path
+from text_layout import fit_text, fit_text_to_image, get_word_width, wrap_text
+
+CAPTION = "weïv ;uhs úys¿ kï b;sx jdlHh úoHdj i;Hh"
+
+def _fits(wrapped_text, size, max_width, max_height):
+    text_bbox = get_text_bbox(resource_path(BENCH_FONT), size, wrapped_text, "center")
+    return text_bbox[2] - text_bbox[0] <= max_width and text_bbox[3] - text_bbox[1] <= max_height
+
+@pytest.mark.parametrize("max_width, max_height", [(600, 300), (300, 400), (900, 80)])
+def test_fit_text_returns_the_largest_size_that_fits(max_width, max_height):
+    ttf_path = resource_path(BENCH_FONT)
+    size, wrapped_text = fit_text(CAPTION, ttf_path, max_width, max_height)
+    assert _fits(wrapped_text, size, max_width, max_height)
+    assert wrapped_text == wrap_text(CAPTION, ttf_path, size, max_width)
+    assert not _fits(wrap_text(CAPTION, ttf_path, size + 1, max_width), size + 1, max_width, max_height)
+
+def test_wrapped_lines_fit_the_width():
+    ttf_path = resource_path(BENCH_FONT)
+    lines = wrap_text(CAPTION, ttf_path, 60, 400).split("\n")
+    assert len(lines) > 1
+    assert " ".join(lines) == CAPTION
+    space_width = get_word_width(ttf_path, 60, " ")
+    for line in lines:
+        words = line.split(" ")
+        assert sum(get_word_width(ttf_path, 60, word) for word in words) + space_width * (len(words) - 1) <= 400
+
+def test_explicit_line_breaks_are_kept():
+    ttf_path = resource_path(BENCH_FONT)
+    assert wrap_text("weïv\n\n;uhs", ttf_path, 60, 2000) == "weïv\n\n;uhs"
+    _, wrapped_text = fit_text("weïv\n;uhs", ttf_path, 2000, 400)
+    assert wrapped_text.split("\n") == ["weïv", ";uhs"]
+
+def test_word_wider_than_the_line_gets_its_own_line():
+    ttf_path = resource_path(BENCH_FONT)
+    long_word = "jdlHhúoHdji;Hhjdlhh"
+    assert wrap_text(f"weïv {long_word} ;uhs", ttf_path, 60, 100) == f"weïv\n{long_word}\n;uhs"
+
+def test_word_that_never_fits_falls_back_to_min_size():
+    ttf_path = resource_path(BENCH_FONT)
+    assert fit_text("jdlHhúoHdji;Hhjdlhh", ttf_path, 20, 400, min_size=10) == (10, "jdlHhúoHdji;Hhjdlhh")
+
+def test_fit_text_shrinks_a_long_word_to_fit():
+    ttf_path = resource_path(BENCH_FONT)
+    size, wrapped_text = fit_text("jdlHhúoHdji;Hhjdlhh", ttf_path, 300, 400)
+    assert 10 < size < 400
+    assert _fits(wrapped_text, size, 300, 400)
+
+@pytest.mark.parametrize("text", ["", "   ", "\n \n"])
+def test_whitespace_only_text(text):
+    ttf_path = resource_path(BENCH_FONT)
+    assert fit_text(text, ttf_path, 300, 200, max_size=120) == (120, text)
+    assert fit_text_to_image(text, ttf_path, (640, 400), 50.0, 90) == (90, text)
+    assert wrap_text(text, ttf_path, 60, 300).strip() == ""
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import image_utils
+
+from benchmark import BENCH_FONT
+from font_utils import resource_path
+from image_utils import generate_overlayed_image
+from variant_render import make_variants, render_variants
+
+QR_CODE = "qr_code.png"
+CAPTION = "weïv ;uhs weïv ;uhs"
+
+def _base(mode):
+    """A 640x400 gradient; the RGBA one also fades from opaque to half transparent so the blend sees real alpha."""
+    x = np.linspace(0, 255, 640, dtype=np.uint8)
+    pixels = np.zeros((400, 640, 4), dtype=np.uint8)
+    pixels[..., 0] = x
+    pixels[..., 1] = 90
+    pixels[..., 2] = x[::-1]
+    pixels[..., 3] = np.linspace(255, 128, 400, dtype=np.uint8)[:, None]
+    return Image.fromarray(pixels, "RGBA").convert(mode)
+
+def _expected(base, variant, monkeypatch):
+    """generate_overlayed_image in the variant's style, its outline width forced where the variant sets one."""
+    with monkeypatch.context() as patch:
+        if variant["outline_width"] is not None:
+            patch.setattr(image_utils, "get_outline_strength", lambda font_size_px: variant["outline_width"])
+        # 72% of 400 px is a whole pixel and runs the caption into the QR code in the bottom-left corner
+        return generate_overlayed_image(base, CAPTION, resource_path(BENCH_FONT), 90, 72.0, variant["font_color"],
+                                        qr_code_file_path=resource_path(QR_CODE), outline_color=variant["outline_color"])
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA"])
+@pytest.mark.parametrize("chunk_size", [1, 16])
+def test_variants_match_generate_overlayed_image(mode, chunk_size, monkeypatch):
+    base = _base(mode)
+    variants = make_variants(["white", "#ffcc00"], ["black", "navy"], [None, 0, 2, 6])
+    rendered = list(render_variants(base, CAPTION, resource_path(BENCH_FONT), 90, variants, 72.0,
+                                    qr_code_file_path=resource_path(QR_CODE), chunk_size=chunk_size))
+    assert len(rendered) == len(variants)
+    for variant, image in zip(variants, rendered):
+        expected = np.asarray(_expected(base, variant, monkeypatch), dtype=np.int16)
+        assert image.mode == "RGBA"
+        assert np.abs(np.asarray(image, dtype=np.int16) - expected).max() <= 1, variant
+
+def test_variants_without_visible_text_are_the_base_and_qr_code():
+    base = _base("RGB")
+    variants = make_variants(["white", "red"])
+    rendered = list(render_variants(base, "", resource_path(BENCH_FONT), 90, variants, qr_code_file_path=resource_path(QR_CODE)))
+    expected = generate_overlayed_image(base, "", resource_path(BENCH_FONT), 90, qr_code_file_path=resource_path(QR_CODE))
+    assert all(np.array_equal(np.asarray(image), np.asarray(expected)) for image in rendered)
+
+def test_negative_outline_width_is_rejected():
+    with pytest.raises(ValueError):
+        list(render_variants(_base("RGB"), CAPTION, resource_path(BENCH_FONT), 90, [{"outline_width": -1}]))
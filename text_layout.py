@@ -0,0 +1,80 @@
+import functools
+
+from font_registry import get_font, get_text_bbox
+
+# --- Layout defaults ---
+DEFAULT_FIT_WIDTH_RATIO = 0.9 # Wrapped text may use this share of the image width
+DEFAULT_FIT_BOTTOM_MARGIN_RATIO = 0.05 # Space kept free below the text, as a share of the image height
+DEFAULT_MIN_FONT_SIZE = 10
+WORD_WIDTH_CACHE_SIZE = 65536 # (font, size, word) advance widths kept
+TEXT_ALIGN_LEFT = "left"
+TEXT_ALIGN_CENTER = "center"
+
+@functools.lru_cache(maxsize=WORD_WIDTH_CACHE_SIZE)
+def get_word_width(ttf_path, font_size_px, word):
+    """Advance width of a word (or a space) in pixels; memoized so wrapping at a size measures each word once."""
+    return get_font(ttf_path, font_size_px).getlength(word)
+
+def wrap_text(text, ttf_path, font_size_px, max_width):
+    """
+    Greedily breaks text into lines no wider than max_width, keeping explicit line breaks. Words are never
+    split, so a single word wider than max_width stays on its own (too wide) line. Returns the wrapped text.
+    """
+    space_width = get_word_width(ttf_path, font_size_px, " ")
+    lines = []
+    for paragraph in text.split("\n"):
+        line_words = []
+        line_width = 0.0
+        for word in paragraph.split():
+            word_width = get_word_width(ttf_path, font_size_px, word)
+            if line_words and line_width + space_width + word_width > max_width:
+                lines.append(" ".join(line_words))
+                line_words, line_width = [word], word_width
+            elif line_words:
+                line_words.append(word)
+                line_width += space_width + word_width
+            else:
+                line_words, line_width = [word], word_width
+        lines.append(" ".join(line_words))
+    return "\n".join(lines)
+
+def _fits(text, ttf_path, font_size_px, max_width, max_height, align):
+    wrapped_text = wrap_text(text, ttf_path, font_size_px, max_width)
+    text_bbox = get_text_bbox(ttf_path, font_size_px, wrapped_text, align)
+    fits = text_bbox[2] - text_bbox[0] <= max_width and text_bbox[3] - text_bbox[1] <= max_height
+    return fits, wrapped_text
+
+def fit_text(text, ttf_path, max_width, max_height, min_size=DEFAULT_MIN_FONT_SIZE, max_size=400, align=TEXT_ALIGN_CENTER):
+    """
+    Finds the largest font size in [min_size, max_size] at which the text, wrapped to max_width, fits in
+    max_width x max_height. Binary search: O(log(max_size - min_size)) wrap + bbox measurements, with word
+    widths memoized across calls. Returns (font_size_px, wrapped_text); if even min_size does not fit,
+    returns min_size wrapped as well as it can be.
+    Raises IOError like get_font if the font cannot be loaded.
+    """
+    if not text.strip():
+        return max_size, text
+    best_size, best_text = min_size, None
+    low, high = min_size, max_size
+    while low <= high:
+        size = (low + high) // 2
+        fits, wrapped_text = _fits(text, ttf_path, size, max_width, max_height, align)
+        if fits:
+            best_size, best_text = size, wrapped_text
+            low = size + 1
+        else:
+            high = size - 1
+    if best_text is None:
+        best_text = wrap_text(text, ttf_path, min_size, max_width)
+    return best_size, best_text
+
+def get_fit_box(image_size, text_y_offset_percent, width_ratio=DEFAULT_FIT_WIDTH_RATIO, bottom_margin_ratio=DEFAULT_FIT_BOTTOM_MARGIN_RATIO):
+    """(max_width, max_height) for text whose top sits at text_y_offset_percent of the image height."""
+    width, height = image_size
+    max_height = height * (1.0 - text_y_offset_percent / 100.0 - bottom_margin_ratio)
+    return max(1, int(width * width_ratio)), max(1, int(max_height))
+
+def fit_text_to_image(text, ttf_path, image_size, text_y_offset_percent, max_size, min_size=DEFAULT_MIN_FONT_SIZE, align=TEXT_ALIGN_CENTER):
+    """fit_text into the box below the text offset of an image of this size. Returns (font_size_px, wrapped_text)."""
+    max_width, max_height = get_fit_box(image_size, text_y_offset_percent)
+    return fit_text(text, ttf_path, max_width, max_height, min_size=min_size, max_size=max(min_size, max_size), align=align)
@@ -0,0 +1,151 @@
+import itertools
+import numpy as np
+from PIL import Image, ImageColor
+
+from font_registry import get_font, get_text_bbox
+from image_utils import (render_text_masks, dilate_mask, get_outline_strength, composite_sprite, get_qr_code_sprite,
+                         get_qr_code_position, DEFAULT_OUTLINE_COLOR, OUTLINE_STROKE_SQUARE, QR_CODE_MARGIN)
+from render_timing import stage_timer, STAGE_OUTLINE, STAGE_COMPOSITE
+
+# Color/outline variant sweeps: the caption is rasterized once and every variant is an alpha blend of the
+# same glyph and outline masks over the same base pixels, done for a chunk of variants at a time in NumPy.
+
+# --- Variant defaults ---
+DEFAULT_VARIANT_CHUNK_SIZE = 16 # Variants blended per NumPy batch
+VARIANT_CHUNK_PIXELS = 4 * 1024 * 1024 # Cap on variants x text-area pixels per batch; bounds the float working set
+
+def make_variants(font_colors, outline_colors=(DEFAULT_OUTLINE_COLOR,), outline_widths=(None,)):
+    """
+    Every combination of the given colors and widths as variant dicts, font color varying slowest.
+    An outline width of None means the default for the font size (get_outline_strength).
+    """
+    return [{"font_color": font_color, "outline_color": outline_color, "outline_width": outline_width}
+            for font_color, outline_color, outline_width in itertools.product(font_colors, outline_colors, outline_widths)]
+
+def _get_rgb(color):
+    """(r, g, b) for a Pillow color name or hex string; the alpha of an RGBA color is ignored, as in colorize_text_masks."""
+    return ImageColor.getrgb(color)[:3]
+
+def _prepare_blend(base_region, glyph_mask, outline_masks):
+    """
+    The variant-independent part of compositing the text over the base: the outline under the fill, then the
+    result over the base, the same operators as colorize_text_masks and Image.alpha_composite. Only pixels
+    some outline covers are kept; every other pixel is the base in every variant.
+    base_region: (h, w, 4) uint8. glyph_mask: (h, w) uint8. outline_masks: (k, h, w) uint8, one per width.
+    Returns the covered pixel indexes and, per width, the fill weight, outline weight and base color term,
+    already divided by the output alpha so a variant is two multiply-adds per channel, and the output alpha.
+    Arrays are planar, (k, [channel,] pixel), so the per-variant math runs over contiguous memory.
+    """
+    covered = np.flatnonzero(outline_masks.max(axis=0))
+    glyph_alpha = glyph_mask.reshape(-1)[covered].astype(np.float32) / 255.0
+    outline_alpha = outline_masks.reshape(len(outline_masks), -1)[:, covered].astype(np.float32) / 255.0
+    base_pixels = base_region.reshape(-1, 4)[covered].T.astype(np.float32)
+
+    outline_alpha *= 1.0 - glyph_alpha # Outline only shows where the fill does not cover it
+    sprite_alpha = glyph_alpha + outline_alpha
+    under = base_pixels[3] / 255.0 * (1.0 - sprite_alpha)
+    alpha = sprite_alpha + under
+    inverse_alpha = np.divide(1.0, alpha, out=np.zeros_like(alpha), where=alpha > 0)
+    fill_weight = glyph_alpha * inverse_alpha
+    outline_weight = outline_alpha * inverse_alpha
+    base_term = base_pixels[None, :3] * (under * inverse_alpha)[:, None, :]
+    output_alpha = (alpha * 255.0 + 0.5).astype(np.uint8)
+    return covered, fill_weight, outline_weight, base_term, output_alpha
+
+def _blend_variants(base_region, blend, width_indexes, font_rgb, outline_rgb):
+    """
+    Blends n variants in one batch. width_indexes: (n,) index into the prepared widths. font_rgb,
+    outline_rgb: (n, 3) float32 in 0..255. Returns (n, h, w, 4) uint8 regions.
+    """
+    covered, fill_weight, outline_weight, base_term, output_alpha = blend
+    color = fill_weight[width_indexes][:, None, :] * font_rgb[:, :, None]
+    color += outline_weight[width_indexes][:, None, :] * outline_rgb[:, :, None]
+    color += base_term[width_indexes]
+    color += 0.5 # Round; the blend is a convex combination, so it already lies in 0..255
+    color = color.astype(np.uint8)
+
+    regions = np.repeat(base_region.reshape(1, -1, 4), len(width_indexes), axis=0)
+    for channel in range(3):
+        regions[:, covered, channel] = color[:, channel]
+    regions[:, covered, 3] = output_alpha[width_indexes]
+    return regions.reshape((len(width_indexes),) + base_region.shape)
+
+def render_variants(base_pil_image, text_to_draw, ttf_path, font_size_px, variants, text_y_offset_percent=50.0, qr_code_file_path=None,
+                    outline_stroke=OUTLINE_STROKE_SQUARE, qr_margin=QR_CODE_MARGIN, text_align="left", chunk_size=DEFAULT_VARIANT_CHUNK_SIZE):
+    """
+    Renders one caption in many styles, yielding one new RGBA image per variant in order. Each variant is a
+    dict with optional "font_color" (default white), "outline_color" (default black) and "outline_width"
+    (pixels, default get_outline_strength(font_size_px)).
+    The base, QR and glyph mask are prepared once and each distinct outline width is dilated once; variants
+    are then blended chunk_size at a time (fewer for large text areas), so memory stays bounded however many
+    are asked for. Text is placed as in generate_overlayed_image, with the QR code stacked over it; pixels
+    match generate_overlayed_image to within rounding.
+    Raises IOError up front if the font cannot be loaded and ValueError for an unknown color.
+    """
+    variants = list(variants)
+    default_width = get_outline_strength(font_size_px)
+    font_rgb = np.array([_get_rgb(variant.get("font_color", "white")) for variant in variants], dtype=np.float32).reshape(-1, 3)
+    outline_rgb = np.array([_get_rgb(variant.get("outline_color", DEFAULT_OUTLINE_COLOR)) for variant in variants],
+                           dtype=np.float32).reshape(-1, 3)
+    outline_widths = [default_width if variant.get("outline_width") is None else int(variant["outline_width"]) for variant in variants]
+    if any(width < 0 for width in outline_widths):
+        raise ValueError("Outline widths cannot be negative.")
+    widest = max(outline_widths, default=default_width)
+
+    font = get_font(ttf_path, font_size_px)
+    with stage_timer(STAGE_COMPOSITE):
+        template = base_pil_image.convert("RGBA")
+    qr_sprite = get_qr_code_sprite(qr_code_file_path, template.height)
+    qr_position = get_qr_code_position(template.size, qr_sprite.size, qr_margin) if qr_sprite is not None else None
+
+    def finish(image):
+        # The QR code goes over the text, as in generate_overlayed_image
+        if qr_sprite is not None:
+            with stage_timer(STAGE_COMPOSITE):
+                composite_sprite(image, qr_sprite, qr_position)
+        return image
+
+    text_masks = None
+    if text_to_draw and variants:
+        text_bbox = get_text_bbox(ttf_path, font_size_px, text_to_draw, text_align)
+        x = (template.width - (text_bbox[2] - text_bbox[0])) / 2 - text_bbox[0]
+        y = template.height * (text_y_offset_percent / 100.0) - text_bbox[1]
+        # Padded for the widest outline; narrower outlines are dilated from the same glyph mask
+        text_masks = render_text_masks(text_to_draw, font, (x, y), widest, outline_stroke, text_bbox=text_bbox, text_align=text_align)
+
+    # The text rectangle clipped to the image; everything outside it is the base for every variant
+    clip = None
+    if text_masks:
+        glyph_mask, widest_outline_mask, (left, top) = text_masks
+        src_left, src_top = max(0, -left), max(0, -top)
+        src_right = min(glyph_mask.width, template.width - left)
+        src_bottom = min(glyph_mask.height, template.height - top)
+        if src_right > src_left and src_bottom > src_top:
+            clip = (src_left, src_top, src_right, src_bottom)
+    if clip is None:
+        for _ in variants:
+            yield finish(template.copy())
+        return
+
+    distinct_widths = sorted(set(outline_widths))
+    with stage_timer(STAGE_OUTLINE):
+        outline_masks = {width: dilate_mask(glyph_mask, width, outline_stroke) for width in distinct_widths if width != widest}
+    outline_masks[widest] = widest_outline_mask
+    src_left, src_top, src_right, src_bottom = clip
+    destination = (left + src_left, top + src_top)
+    base_region = np.asarray(template.crop((destination[0], destination[1], left + src_right, top + src_bottom)))
+    with stage_timer(STAGE_COMPOSITE):
+        blend = _prepare_blend(base_region, np.asarray(glyph_mask.crop(clip)),
+                               np.stack([np.asarray(outline_masks[width].crop(clip)) for width in distinct_widths]))
+    width_indexes = np.array([distinct_widths.index(width) for width in outline_widths])
+
+    chunk_size = max(1, min(chunk_size, VARIANT_CHUNK_PIXELS // max(1, base_region.shape[0] * base_region.shape[1])))
+    for start in range(0, len(variants), chunk_size):
+        end = start + chunk_size
+        with stage_timer(STAGE_COMPOSITE):
+            blended = _blend_variants(base_region, blend, width_indexes[start:end], font_rgb[start:end], outline_rgb[start:end])
+        for region in blended:
+            with stage_timer(STAGE_COMPOSITE):
+                image = template.copy()
+                image.paste(Image.fromarray(region, "RGBA"), destination)
+            yield finish(image)